@@ -1,78 +1,213 @@
+import argparse
+import functools
+import glob
+import hashlib
+import os
+import re
+import sys
+from concurrent.futures import Future, ProcessPoolExecutor
+
 import pandas as pd
 import numpy as np
 
-def clean_cervical_cancer_data_simplified(input_csv_path, output_csv_path):
+from core.profiling import StageProfiler
+
+# Columns relevant for the Django models, in the order seed_data.py expects them
+FINAL_COLUMNS = [
+    'Patient ID', 'Age', 'Sexual Partners', 'First Sexual Activity Age',
+    'Risk Level', 'HPV Test Result', 'Pap Smear Result', 'Smoking Status',
+    'STDs History', 'Region', 'Insrance Covered', 'Recommended Action',
+    'Screening Type Last'
+]
+# Columns read from the source files. 'Patient ID' and 'Risk Level' are (re)computed, everything else is dropped early.
+SOURCE_COLUMNS = [col for col in FINAL_COLUMNS if col not in ('Patient ID', 'Risk Level')]
+NUMERIC_COLUMNS = ['Age', 'Sexual Partners', 'First Sexual Activity Age']
+
+# Rows per batch when streaming CSV or Excel inputs
+BATCH_SIZE = 10000
+
+# Longest file-name part of a Patient ID prefix, leaving room in the 150-character username for the number
+MAX_PREFIX_SLUG = 120
+
+
+def iter_csv_batches(path, batch_size=BATCH_SIZE):
     """
-    Cleans and processes the partially pre-processed cervical cancer dataset,
-    specifically to add 'Risk Level' and ensure correct formatting for Django seeding.
+    Yields the rows of a CSV file as DataFrames of at most `batch_size` rows.
+    """
+    yield from pd.read_csv(path, chunksize=batch_size)
+
+
+def iter_xlsx_batches(path, sheet_name=None, batch_size=BATCH_SIZE):
+    """
+    Streams a worksheet of an .xlsx workbook as DataFrames of at most `batch_size` rows.
+
+    The workbook is opened in read-only mode, so openpyxl parses rows lazily instead of
+    building the whole sheet in memory. Formula cells yield their cached values.
 
     Args:
-        input_csv_path (str): Path to the current input CSV file.
-        output_csv_path (str): Path where the cleaned CSV file will be saved.
+        path (str): Path to the workbook.
+        sheet_name (str): Worksheet to read. Defaults to the first sheet.
+        batch_size (int): Maximum number of rows per yielded DataFrame.
     """
+    from openpyxl import load_workbook # Only needed for Excel inputs
+
+    workbook = load_workbook(path, read_only=True, data_only=True)
     try:
-        # 1. Load the dataset
-        df = pd.read_csv(input_csv_path)
-        print(f"Original data shape: {df.shape}")
-        print("Original columns:", df.columns.tolist())
-
-        # 2. Drop the 'Unnamed: 12' column if it exists
-        if 'Unnamed: 12' in df.columns:
-            df = df.drop(columns=['Unnamed: 12'])
-            print("Dropped 'Unnamed: 12' column.")
-
-        # 3. Ensure numeric types for relevant columns
-        numeric_cols = ['Age', 'Sexual Partners', 'First Sexual Activity Age']
-        for col in numeric_cols:
+        sheet = workbook[sheet_name] if sheet_name else workbook.worksheets[0]
+        rows = sheet.iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        # Skip unnamed (empty header) columns, the Excel equivalent of 'Unnamed: 12' in the CSV export
+        keep = [i for i, name in enumerate(header) if name is not None]
+        columns = [header[i] for i in keep]
+
+        batch = []
+        for row in rows:
+            if all(value is None for value in row):
+                continue # Trailing formatted-but-empty rows
+            batch.append([row[i] if i < len(row) else None for i in keep])
+            if len(batch) >= batch_size:
+                yield pd.DataFrame(batch, columns=columns)
+                batch = []
+        if batch:
+            yield pd.DataFrame(batch, columns=columns)
+    finally:
+        workbook.close() # Read-only workbooks hold the file open until closed
+
+
+def iter_batches(path, sheet_name=None, batch_size=BATCH_SIZE):
+    """
+    Yields DataFrame batches from a CSV or .xlsx input, picked by file extension.
+    """
+    if path.lower().endswith(('.xlsx', '.xlsm')):
+        return iter_xlsx_batches(path, sheet_name=sheet_name, batch_size=batch_size)
+    return iter_csv_batches(path, batch_size=batch_size)
+
+
+def normalize_batch(df):
+    """
+    Row-local cleaning stages, safe to apply to each batch independently:
+    drops unused columns, coerces numeric columns and maps the Y/N flags.
+    """
+    # 2. Keep only the source columns (drops 'Unnamed: 12' and anything else not seeded)
+    df = df[[col for col in df.columns if col in SOURCE_COLUMNS]].copy()
+
+    # 3. Ensure numeric types for relevant columns (imputation needs the whole dataset, see finalize_dataframe)
+    for col in NUMERIC_COLUMNS:
+        if col in df.columns:
+            df[col] = pd.to_numeric(df[col], errors='coerce')
+
+    # Ensure Smoking Status and STDs History are 'Y'/'N'
+    binary_map = {1: 'Y', 0: 'N', 'Y': 'Y', 'N': 'N'} # Handle both 0/1 and 'Y'/'N'
+    if 'Smoking Status' in df.columns:
+        df['Smoking Status'] = df['Smoking Status'].astype(str).str.upper().map(binary_map).fillna('N')
+    if 'STDs History' in df.columns:
+        df['STDs History'] = df['STDs History'].astype(str).str.upper().map(binary_map).fillna('N')
+    if 'Insrance Covered' in df.columns: # Correct for possible initial 'N' or 0/1
+        df['Insrance Covered'] = df['Insrance Covered'].astype(str).str.upper().map({'Y': 'Y', 'N': 'N', '1': 'Y', '0': 'N'}).fillna('N')
+    return df
+
+
+def load_dataset(path, sheet_name=None, batch_size=BATCH_SIZE, profiler=None):
+    """
+    Streams a CSV or .xlsx input batch by batch through `normalize_batch` and
+    returns the concatenated, normalized DataFrame.
+    """
+    profiler = profiler or StageProfiler('clean_data', enabled=False)
+    batches = iter_batches(path, sheet_name=sheet_name, batch_size=batch_size)
+    frames = []
+    while True:
+        with profiler.stage('read') as stage:
+            batch = next(batches, None)
+            if batch is not None:
+                stage.rows += len(batch)
+        if batch is None:
+            break
+        with profiler.stage('normalize') as stage:
+            frames.append(normalize_batch(batch))
+            stage.rows += len(batch)
+    if not frames:
+        return pd.DataFrame(columns=SOURCE_COLUMNS)
+    return pd.concat(frames, ignore_index=True)
+
+
+def finalize_dataframe(df, id_prefix='P', profiler=None):
+    """
+    Dataset-wide cleaning stages, applied once all batches are loaded: median imputation,
+    risk scoring, Patient ID assignment and final column selection.
+
+    Args:
+        df (pandas.DataFrame): The normalized dataset (see `normalize_batch`).
+        id_prefix (str): Prefix for the generated Patient IDs. Rows are numbered from 1 after the prefix.
+        profiler (StageProfiler): Optional; times the imputation, risk scoring and Patient ID stages.
+    """
+    profiler = profiler or StageProfiler('clean_data', enabled=False)
+    with profiler.stage('impute') as stage:
+        for col in NUMERIC_COLUMNS:
             if col in df.columns:
-                df[col] = pd.to_numeric(df[col], errors='coerce')
-                df[col].fillna(df[col].median(), inplace=True) # Impute missing numeric with median
-
-        # Ensure Smoking Status and STDs History are 'Y'/'N'
-        binary_map = {1: 'Y', 0: 'N', 'Y': 'Y', 'N': 'N'} # Handle both 0/1 and 'Y'/'N'
-        if 'Smoking Status' in df.columns:
-            df['Smoking Status'] = df['Smoking Status'].astype(str).str.upper().map(binary_map).fillna('N')
-        if 'STDs History' in df.columns:
-            df['STDs History'] = df['STDs History'].astype(str).str.upper().map(binary_map).fillna('N')
-        if 'Insrance Covered' in df.columns: # Correct for possible initial 'N' or 0/1
-            df['Insrance Covered'] = df['Insrance Covered'].astype(str).str.upper().map({'Y': 'Y', 'N': 'N', '1': 'Y', '0': 'N'}).fillna('N')
-
-
-        # 4. Calculate 'Risk Level' based on existing columns
-        # This logic is for demonstration. For a real AI system, this would be a model prediction.
-        def assign_risk_level_from_current_data(row):
-            risk = 'Low Risk'
-            if row['Age'] > 50 or row['Smoking Status'] == 'Y' or row['STDs History'] == 'Y':
-                risk = 'Moderate Risk'
-            # Assuming 'HPV Test Result' is 'POSITIVE'/'NEGATIVE' and 'Pap Smear Result' is 'Y'/'N'
-            if row['HPV Test Result'] == 'POSITIVE' or row['Pap Smear Result'] == 'Y':
-                risk = 'High Risk'
-            return risk
+                df[col] = df[col].fillna(df[col].median()) # Impute missing numeric with median
+                if df[col].notna().all() and (df[col] % 1 == 0).all():
+                    df[col] = df[col].astype('int64') # Keep whole numbers as ints so seed_data can int() them
+        stage.rows += len(df)
+
+    # 4. Calculate 'Risk Level' based on existing columns
+    # This logic is for demonstration. For a real AI system, this would be a model prediction.
+    def assign_risk_level_from_current_data(row):
+        risk = 'Low Risk'
+        if row['Age'] > 50 or row['Smoking Status'] == 'Y' or row['STDs History'] == 'Y':
+            risk = 'Moderate Risk'
+        # Assuming 'HPV Test Result' is 'POSITIVE'/'NEGATIVE' and 'Pap Smear Result' is 'Y'/'N'
+        if row['HPV Test Result'] == 'POSITIVE' or row['Pap Smear Result'] == 'Y':
+            risk = 'High Risk'
+        return risk
 
+    with profiler.stage('risk_scoring') as stage:
         df['Risk Level'] = df.apply(assign_risk_level_from_current_data, axis=1)
+        stage.rows += len(df)
 
-        # 5. Ensure Patient ID is sequential and unique for seeding
-        df['Patient ID'] = [f'P{i+1:04d}' for i in range(len(df))]
+    # 5. Ensure Patient ID is sequential and unique for seeding
+    # Numbers are zero-padded to 4 digits and simply grow longer past 9999 (P9999, P10000), so IDs never wrap,
+    # and a file that grows keeps the IDs of its earlier rows
+    with profiler.stage('patient_ids') as stage:
+        df['Patient ID'] = [f'{id_prefix}{i+1:04d}' for i in range(len(df))]
+        stage.rows += len(df)
 
 
-        # Select only the columns relevant for your Django models
-        # Ensure column names match what your seed_data.py expects
-        final_columns = [
-            'Patient ID', 'Age', 'Sexual Partners', 'First Sexual Activity Age',
-            'Risk Level', 'HPV Test Result', 'Pap Smear Result', 'Smoking Status',
-            'STDs History', 'Region', 'Insrance Covered', 'Recommended Action',
-            'Screening Type Last'
-        ]
+    # Ensure all final columns exist in the DataFrame before selecting
+    missing_cols = [col for col in FINAL_COLUMNS if col not in df.columns]
+    if missing_cols:
+        print(f"Warning: The following expected columns are missing in your input CSV and cannot be included: {missing_cols}")
+        # If these are critical for your Django model, you might need to reconsider your input CSV.
 
-        # Ensure all final_columns exist in the DataFrame before selecting
-        missing_cols = [col for col in final_columns if col not in df.columns]
-        if missing_cols:
-            print(f"Warning: The following expected columns are missing in your input CSV and cannot be included: {missing_cols}")
-            # If these are critical for your Django model, you might need to reconsider your input CSV.
+    df_cleaned = df[FINAL_COLUMNS]
+    print(f"Cleaned data shape: {df_cleaned.shape}")
+    print("Cleaned columns:", df_cleaned.columns.tolist())
+    return df_cleaned
 
-        df_cleaned = df[final_columns]
-        print(f"Cleaned data shape: {df_cleaned.shape}")
-        print("Cleaned columns:", df_cleaned.columns.tolist())
+
+def clean_dataframe(df, id_prefix='P'):
+    """
+    Applies all cleaning stages to an already loaded dataset and returns the seeding-ready DataFrame.
+    """
+    return finalize_dataframe(normalize_batch(df), id_prefix=id_prefix)
+
+
+def clean_cervical_cancer_data_simplified(input_csv_path, output_csv_path):
+    """
+    Cleans and processes the partially pre-processed cervical cancer dataset,
+    specifically to add 'Risk Level' and ensure correct formatting for Django seeding.
+
+    Args:
+        input_csv_path (str): Path to the current input CSV or .xlsx file.
+        output_csv_path (str): Path where the cleaned CSV file will be saved.
+    """
+    try:
+        # 1. Load the dataset, streaming it batch by batch
+        df = load_dataset(input_csv_path)
+        print(f"Loaded data shape: {df.shape}")
+
+        df_cleaned = finalize_dataframe(df)
 
         # 6. Save the cleaned dataset
         df_cleaned.to_csv(output_csv_path, index=False, encoding='utf-8')
@@ -86,16 +221,216 @@ def clean_cervical_cancer_data_simplified(input_csv_path, output_csv_path):
     except Exception as e:
         print(f"An unexpected error occurred: {e}")
 
+
+def resolve_input_files(inputs):
+    """
+    Expands a list of files, directories (all CSV and .xlsx files directly inside) and glob patterns
+    into a sorted, de-duplicated list of input files.
+    """
+    paths = set()
+    for item in inputs:
+        if os.path.isdir(item):
+            paths.update(glob.glob(os.path.join(item, '*.csv')))
+            paths.update(glob.glob(os.path.join(item, '*.xlsx')))
+        elif glob.has_magic(item):
+            paths.update(glob.glob(item))
+        else:
+            paths.add(item)
+    return sorted(os.path.abspath(path) for path in paths)
+
+
+def patient_id_prefix(path):
+    """
+    Derives the Patient ID prefix for one regional export from its file name,
+    e.g. 'exports/Kakamega County.csv' -> 'P-KAKAMEGA-COUNTY-'.
+    The prefix only depends on the file name, so IDs stay stable when other exports are added or removed.
+    The whole name is kept, so periodic exports ('... 2026-01.xlsx', '... 2026-02.xlsx') get distinct prefixes;
+    only a name too long for a username (150 characters) is shortened, with a hash of the full name appended.
+    """
+    stem = os.path.splitext(os.path.basename(path))[0]
+    slug = re.sub(r'[^A-Z0-9]+', '-', stem.upper()).strip('-')
+    if len(slug) > MAX_PREFIX_SLUG:
+        digest = hashlib.sha1(stem.encode('utf-8')).hexdigest()[:8].upper()
+        slug = f"{slug[:MAX_PREFIX_SLUG - 9].rstrip('-')}-{digest}"
+    return f'P-{slug}-'
+
+
+def _clean_file(path, id_prefix, sheet_name=None, batch_size=BATCH_SIZE, profiler=None):
+    # Stream and clean a single export
+    df = load_dataset(path, sheet_name=sheet_name, batch_size=batch_size, profiler=profiler)
+    print(f"[{os.path.basename(path)}] Loaded data shape: {df.shape}")
+    return finalize_dataframe(df, id_prefix=id_prefix, profiler=profiler)
+
+
+def _clean_file_in_worker(path, id_prefix, sheet_name=None, batch_size=BATCH_SIZE, profile=False):
+    # Runs in a worker process. When profiling, the worker measures its own stages (tracemalloc is per process)
+    # and hands them back with the cleaned file for the parent to merge.
+    profiler = StageProfiler('clean_data', enabled=profile)
+    profiler.start()
+    try:
+        df = _clean_file(path, id_prefix, sheet_name, batch_size, profiler)
+    finally:
+        profiler.stop()
+    return df, profiler.stage_dicts()
+
+
+class _InlineExecutor:
+    # Stand-in for the process pool that runs each file in this process. Used under cProfile,
+    # which only sees the process it runs in.
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def submit(self, fn, *args):
+        future = Future()
+        try:
+            future.set_result(fn(*args))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+
+def clean_many(input_paths, output_csv_path, workers=None, sheet_name=None, batch_size=BATCH_SIZE, profiler=None,
+               id_prefix=None):
+    """
+    Cleans several exports (CSV or .xlsx) in parallel across a process pool and merges them into one processed dataset.
+
+    Each file's Patient IDs get the prefix `patient_id_prefix` derives from its file name, so a file's IDs are the
+    same whichever other files are cleaned with it, and never collide across files. `id_prefix` overrides this for
+    a single input (e.g. 'P' for the historical 'P0001' IDs of the bundled dataset).
+
+    With an enabled `profiler`, per-stage measurements from the workers are merged into it (stage times add up
+    across workers, peaks are the largest of any one process). If it also writes a cProfile dump, the files are
+    cleaned one after another in this process so the dump covers the whole run.
+
+    Returns:
+        bool: True if every file was cleaned and the merged dataset was written.
+    """
+    profiler = profiler or StageProfiler('clean_data', enabled=False)
+    if id_prefix is not None:
+        if len(input_paths) != 1:
+            print("Error: an explicit Patient ID prefix can only be used with a single input file.")
+            return False
+        prefixes = {input_paths[0]: id_prefix}
+    else:
+        prefixes = {path: patient_id_prefix(path) for path in input_paths}
+        seen = {}
+        for path, prefix in prefixes.items():
+            if prefix in seen:
+                print(f"Error: {path} and {seen[prefix]} map to the same Patient ID prefix '{prefix}'. Rename one of them.")
+                return False
+            seen[prefix] = path
+
+    frames = {}
+    failed = False
+    if profiler.cprofile_path:
+        pool = _InlineExecutor()
+
+        def clean_file(*args):
+            return _clean_file(*args, profiler=profiler), [] # Measured directly by this process's profiler
+    else:
+        pool = ProcessPoolExecutor(max_workers=workers)
+        clean_file = functools.partial(_clean_file_in_worker, profile=profiler.enabled)
+    with pool:
+        futures = {
+            path: pool.submit(clean_file, path, prefixes[path], sheet_name, batch_size)
+            for path in input_paths
+        }
+        for path, future in futures.items():
+            try:
+                frames[path], worker_stages = future.result()
+                profiler.merge(worker_stages)
+            except FileNotFoundError:
+                print(f"Error: Input file not found at {path}")
+                failed = True
+            except KeyError as e:
+                print(f"An error occurred while cleaning {path}: Column '{e}' not found. "
+                      "Please check the file's column names against the script's expectations.")
+                failed = True
+            except Exception as e:
+                print(f"An unexpected error occurred while cleaning {path}: {e}")
+                failed = True
+
+    if failed:
+        print("No output written because at least one input file failed.")
+        return False
+
+    # Merge in sorted path order so the output is identical between runs
+    with profiler.stage('merge') as stage:
+        df_merged = pd.concat([frames[path] for path in input_paths], ignore_index=True)
+        stage.rows += len(df_merged)
+    with profiler.stage('write_csv') as stage:
+        df_merged.to_csv(output_csv_path, index=False, encoding='utf-8')
+        stage.rows += len(df_merged)
+    profiler.rows = len(df_merged)
+    print(f"Merged {len(input_paths)} file(s) into {df_merged.shape[0]} rows, saved to {output_csv_path}")
+    return True
+
+
 if __name__ == "__main__":
-    # IMPORTANT: Keep this as the actual path to your original CSV file
-    input_file = r'C:\Users\Martina\Desktop\Femtrack2\Cervical Cancer Datasets_.xlsx - Cervical Cancer Risk Factors.csv'
-    # IMPORTANT: Define the output path for the cleaned CSV (should be in your Django backend root)
-    output_file = r'C:\Users\Martina\Desktop\Femtrack2\FemTrackAI_Backend\cervical_cancer_processed_data.csv'
+    backend_dir = os.path.dirname(os.path.abspath(__file__))
+    parser = argparse.ArgumentParser(description='Clean cervical cancer exports into the CSV used by seed_data.')
+    bundled_dataset = os.path.join(backend_dir, '..', 'Cervical Cancer Datasets_.xlsx - Cervical Cancer Risk Factors.xlsx')
+    parser.add_argument(
+        'inputs', nargs='*',
+        help='Input CSV/.xlsx files, directories of them, or glob patterns (e.g. "exports/*.xlsx"). '
+             'Default: the bundled workbook, with P0001 style IDs'
+    )
+    parser.add_argument(
+        '-o', '--output', default=os.path.join(backend_dir, 'cervical_cancer_processed_data.csv'),
+        help='Path where the merged, cleaned CSV will be saved'
+    )
+    parser.add_argument('-w', '--workers', type=int, default=None, help='Number of worker processes (default: CPU count)')
+    parser.add_argument('--sheet', default=None, help='Worksheet to read from .xlsx inputs (default: the first sheet)')
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE, help='Rows per streamed batch')
+    parser.add_argument(
+        '--id-prefix', default=None,
+        help='Patient ID prefix for a single input file (default: derived from the file name, e.g. P-KAKAMEGA-COUNTY-)'
+    )
+    parser.add_argument(
+        '--profile', metavar='REPORT_JSON', default=None,
+        help='Write per-stage wall time, rows/sec and peak memory (tracemalloc) to this JSON file'
+    )
+    parser.add_argument(
+        '--cprofile', metavar='DUMP', default=None,
+        help='With --profile, also write a cProfile dump (files are then cleaned in this process, not in workers)'
+    )
+    args = parser.parse_args()
+    if args.cprofile and not args.profile:
+        parser.error('--cprofile requires --profile')
+
+    id_prefix = args.id_prefix
+    if not args.inputs:
+        args.inputs = [bundled_dataset]
+        if id_prefix is None:
+            id_prefix = 'P' # The bundled dataset keeps the P0001 IDs seeded databases already use
+
+    input_files = resolve_input_files(args.inputs)
+    if not input_files:
+        parser.error('no input files matched')
+    if id_prefix is not None and len(input_files) != 1:
+        parser.error('--id-prefix can only be used with a single input file')
 
     # Make sure the output directory exists
-    import os
-    output_dir = os.path.dirname(output_file)
+    output_dir = os.path.dirname(os.path.abspath(args.output))
     if not os.path.exists(output_dir):
         os.makedirs(output_dir)
 
-    clean_cervical_cancer_data_simplified(input_file, output_file)
\ No newline at end of file
+    profiler = StageProfiler('clean_data', enabled=bool(args.profile), cprofile_path=args.cprofile)
+    profiler.start()
+    try:
+        ok = clean_many(
+            input_files, args.output, workers=args.workers, sheet_name=args.sheet, batch_size=args.batch_size,
+            profiler=profiler, id_prefix=id_prefix
+        )
+    finally:
+        profiler.stop()
+    if args.profile:
+        profiler.write_report(
+            args.profile, inputs=input_files, output=os.path.abspath(args.output), ok=ok,
+            workers=args.workers, batch_size=args.batch_size, id_prefix=id_prefix
+        )
+        print(f"Profile report written to {args.profile}")
+    sys.exit(0 if ok else 1)
@@ -1,3 +1,158 @@
 from django.contrib import admin
+from django.contrib.admin.views.main import PAGE_VAR
+from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
+from django.core.paginator import Paginator
+from django.utils.functional import cached_property
 
-# Register your models here.
+from .events import publish_patient_update
+from .models import (
+    User, PatientProfile, DoctorProfile, ScreeningRecord, ArchivedScreeningRecord, PatientAssignment,
+    Region, ScreeningType, RecommendedAction, RiskLevel
+)
+
+RISK_LEVELS = ['High Risk', 'Moderate Risk', 'Low Risk', 'Unknown']
+
+
+class LookaheadPaginator(Paginator):
+    """
+    Paginator for large changelists that never counts the whole result: it counts at most `pages_ahead` pages
+    past the requested one (COUNT over a LIMIT subquery). Every page it reports exists, the count is exact once
+    the end of the list is within reach, and otherwise `is_capped` is set and the list shows "N+".
+    """
+    pages_ahead = 5
+
+    def __init__(self, object_list, per_page, orphans=0, allow_empty_first_page=True, page_number=1):
+        super().__init__(object_list, per_page, orphans, allow_empty_first_page)
+        self.page_number = max(page_number, 1)
+        self.is_capped = False
+
+    @cached_property
+    def count(self):
+        limit = (self.page_number + self.pages_ahead) * self.per_page
+        counted = self.object_list[:limit + 1].count()
+        self.is_capped = counted > limit
+        return min(counted, limit)
+
+
+class LargeTableAdmin(admin.ModelAdmin):
+    # Shared settings for changelists over tables that grow with the registry
+    paginator = LookaheadPaginator
+    show_full_result_count = False # Skip the second, unfiltered COUNT(*) on filtered pages
+    list_per_page = 50
+
+    def get_paginator(self, request, queryset, per_page, orphans=0, allow_empty_first_page=True):
+        try:
+            page_number = int(request.GET.get(PAGE_VAR, 1))
+        except ValueError:
+            page_number = 1
+        return self.paginator(queryset, per_page, orphans, allow_empty_first_page, page_number=page_number)
+
+
+def set_field_action(field, value, description):
+    """
+    Builds an admin bulk action that sets `field` to `value` on every selected row in a single UPDATE.
+    """
+    def set_field(modeladmin, request, queryset):
+        updated = queryset.update(**{field: value})
+        modeladmin.message_user(request, f'{updated} record(s) updated.')
+    set_field.__name__ = f"set_{field}_{str(value).lower().replace(' ', '_')}"
+    return admin.action(description=description)(set_field)
+
+
+@admin.register(User)
+class UserAdmin(BaseUserAdmin, LargeTableAdmin):
+    list_display = ('email', 'username', 'user_type', 'first_name', 'last_name', 'is_active', 'is_staff')
+    list_filter = ('user_type', 'is_staff', 'is_active')
+    search_fields = ('^username', '^email') # Prefix lookups only, so searches don't scan the whole table
+    ordering = ('-id',)
+    fieldsets = BaseUserAdmin.fieldsets + (('FemTrack', {'fields': ('user_type',)}),)
+    add_fieldsets = (
+        (None, {
+            'classes': ('wide',),
+            'fields': ('email', 'username', 'user_type', 'password1', 'password2'),
+        }),
+    )
+    actions = [
+        set_field_action('is_active', True, 'Activate selected users'),
+        set_field_action('is_active', False, 'Deactivate selected users'),
+    ]
+
+
+@admin.register(PatientProfile)
+class PatientProfileAdmin(LargeTableAdmin):
+    list_display = ('user', 'age', 'sexual_partners', 'first_sexual_activity_age', 'risk_level')
+    list_select_related = ('user',) # __str__ and the 'user' column read user.email
+    list_filter = ('risk_level',)
+    search_fields = ('^user__username', '^user__email')
+    raw_id_fields = ('user',)
+    ordering = ('-user_id',)
+    actions = [set_field_action('risk_level', level, f'Mark selected patients as {level}') for level in RISK_LEVELS]
+
+
+@admin.register(DoctorProfile)
+class DoctorProfileAdmin(admin.ModelAdmin):
+    list_display = ('__str__', 'user', 'specialization')
+    list_select_related = ('user',)
+    search_fields = ('^user__username', '^user__email')
+    raw_id_fields = ('user',)
+
+
+@admin.register(PatientAssignment)
+class PatientAssignmentAdmin(LargeTableAdmin):
+    # Where staff put patients on a doctor's panel; the API never assigns patients by itself
+    list_display = ('id', 'doctor', 'patient', 'assigned_at')
+    list_select_related = ('doctor__user', 'patient__user')
+    search_fields = ('^patient__user__username', '^doctor__user__email')
+    raw_id_fields = ('doctor', 'patient')
+
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        if not change:
+            # The patient appears on the doctor's live dashboard; other doctors' counters are unchanged
+            publish_patient_update(
+                obj.patient, old_risk_level=obj.patient.risk_level, newly_assigned_doctor_ids=[obj.doctor_id]
+            )
+
+
+@admin.register(ScreeningRecord)
+class ScreeningRecordAdmin(LargeTableAdmin):
+    list_display = ('id', 'patient', 'screening_date', 'screening_type', 'region', 'assessment_risk_level', 'doctor')
+    # __str__ of the record, patient and doctor all go through the related users; the lookup names are listed too
+    list_select_related = ('patient__user', 'doctor__user', 'screening_type', 'region')
+    list_filter = ('assessment_risk_level', 'region', 'screening_date')
+    search_fields = ('^patient__user__username',)
+    raw_id_fields = ('patient', 'doctor')
+    readonly_fields = ('screening_date', 'source_fingerprint')
+    actions = [
+        set_field_action('assessment_risk_level', level, f'Mark selected screenings as {level.label}')
+        for level in reversed(RiskLevel)
+    ] + [set_field_action('doctor', None, 'Unassign doctor from selected screenings')]
+
+
+@admin.register(ArchivedScreeningRecord)
+class ArchivedScreeningRecordAdmin(LargeTableAdmin):
+    # Archived screenings are history: viewable and searchable, but not edited here
+    list_display = ('id', 'patient', 'screening_date', 'screening_type', 'assessment_risk_level', 'archived_at')
+    list_select_related = ('patient__user', 'screening_type')
+    list_filter = ('screening_date',)
+    search_fields = ('^patient__user__username',)
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(Region, ScreeningType, RecommendedAction)
+class LookupTableAdmin(admin.ModelAdmin):
+    # Rows can be added but not renamed or deleted: every process caches the names (core/lookups.py), and
+    # clearing the cache on save would only reach the process that handled the save
+    list_display = ('name',)
+    search_fields = ('^name',)
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
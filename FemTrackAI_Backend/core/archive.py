@@ -0,0 +1,35 @@
+# core/archive.py
+from django.db import transaction
+from django.db.models import Exists, OuterRef, Q
+
+from .models import ScreeningRecord, ArchivedScreeningRecord
+
+# Columns copied verbatim from a live screening into its archived copy
+ARCHIVED_FIELDS = [field.attname for field in ScreeningRecord._meta.concrete_fields]
+
+
+def archivable_screenings(cutoff):
+    """
+    Live screenings dated before `cutoff` that can be archived: every one except each patient's latest
+    screening (the one patient.screenings.first() returns), so risk state and last screening dates never
+    depend on the archive. The newer-screening check uses the (patient, -screening_date) index.
+    """
+    newer = ScreeningRecord.objects.filter(patient=OuterRef('patient')).filter(
+        Q(screening_date__gt=OuterRef('screening_date'))
+        | Q(screening_date=OuterRef('screening_date'), id__gt=OuterRef('id'))
+    )
+    return ScreeningRecord.objects.filter(screening_date__lt=cutoff).filter(Exists(newer))
+
+
+def archive_batch(cutoff, batch_size):
+    """
+    Moves up to `batch_size` archivable screenings into ArchivedScreeningRecord in one transaction:
+    one INSERT of the copies, one DELETE of the originals. Returns the number of screenings moved.
+    """
+    with transaction.atomic():
+        rows = list(archivable_screenings(cutoff).order_by('id').values(*ARCHIVED_FIELDS)[:batch_size])
+        if not rows:
+            return 0
+        ArchivedScreeningRecord.objects.bulk_create([ArchivedScreeningRecord(**row) for row in rows])
+        ScreeningRecord.objects.filter(id__in=[row['id'] for row in rows]).delete()
+    return len(rows)
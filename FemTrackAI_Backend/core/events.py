@@ -0,0 +1,127 @@
+# core/events.py
+import asyncio
+import json
+import threading
+
+from django.db import transaction
+
+# Maps PatientProfile.risk_level values to the summary-counts keys used by the doctor dashboard
+RISK_COUNT_KEYS = {
+    'High Risk': 'high_risk',
+    'Moderate Risk': 'moderate_risk',
+    'Low Risk': 'low_risk',
+    'Unknown': 'pending_assessment', # Assuming 'Unknown' means pending or needs review
+}
+
+# Events buffered per idle client before it is told to resync instead
+SUBSCRIBER_QUEUE_SIZE = 100
+
+
+class BroadcastHub:
+    """
+    In-process publish/subscribe hub for dashboard events. No external broker: each worker process has its
+    own hub, so a client only sees changes made through the worker it is connected to.
+
+    Subscribers are asyncio queues living on the server's event loop; publishers may be sync views running
+    in worker threads, so delivery is handed to each subscriber's loop with call_soon_threadsafe.
+    """
+
+    def __init__(self, queue_size=SUBSCRIBER_QUEUE_SIZE):
+        self.queue_size = queue_size
+        self._lock = threading.Lock()
+        self._subscribers = {} # topic -> set of (loop, queue)
+
+    def subscribe(self, topic):
+        # Must be called from the event loop that will consume the queue
+        subscriber = (asyncio.get_running_loop(), asyncio.Queue(maxsize=self.queue_size))
+        with self._lock:
+            self._subscribers.setdefault(topic, set()).add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, topic, subscriber):
+        with self._lock:
+            subscribers = self._subscribers.get(topic)
+            if subscribers:
+                subscribers.discard(subscriber)
+                if not subscribers:
+                    del self._subscribers[topic]
+
+    def subscribed_topics(self, topics):
+        """Returns the subset of `topics` that currently have at least one subscriber."""
+        with self._lock:
+            return [topic for topic in topics if topic in self._subscribers]
+
+    def has_subscribers(self):
+        with self._lock:
+            return bool(self._subscribers)
+
+    def publish(self, topic, event):
+        with self._lock:
+            subscribers = list(self._subscribers.get(topic, ()))
+        for loop, queue in subscribers:
+            try:
+                loop.call_soon_threadsafe(self._offer, queue, event)
+            except RuntimeError:
+                pass # Loop already closed; the subscriber is going away
+
+    @staticmethod
+    def _offer(queue, event):
+        if queue.full():
+            # Slow client: drop what it has not read and ask it to refetch instead of growing without bound
+            while not queue.empty():
+                queue.get_nowait()
+            event = {'type': 'resync'}
+        queue.put_nowait(event)
+
+
+hub = BroadcastHub()
+
+
+def doctor_topic(doctor_id):
+    return f'doctor:{doctor_id}'
+
+
+def format_sse(event):
+    """Encodes an event dict as a Server-Sent Events message."""
+    return f"event: {event['type']}\ndata: {json.dumps(event.get('data', {}), default=str)}\n\n"
+
+
+def publish_patient_update(patient_profile, old_risk_level=None, newly_assigned_doctor_ids=()):
+    """
+    Pushes a compact delta for one patient to the dashboards of the doctors whose panel they are on:
+    the changes to the summary counters and the patient's refreshed dashboard row.
+    Sent once the surrounding transaction commits, and only if someone is listening.
+
+    Args:
+        patient_profile (PatientProfile): The patient that was created or changed.
+        old_risk_level (str): Risk level before the change, or None if the patient is new to the panel.
+        newly_assigned_doctor_ids (iterable): Doctors whose panel the patient just joined.
+    """
+    if not hub.has_subscribers():
+        return
+
+    def send():
+        from .models import PatientAssignment
+        from .serializers import DoctorPatientListSerializer
+
+        doctor_ids = list(PatientAssignment.objects.filter(patient=patient_profile).values_list('doctor_id', flat=True))
+        topics = hub.subscribed_topics([doctor_topic(doctor_id) for doctor_id in doctor_ids])
+        if not topics:
+            return
+
+        row = DoctorPatientListSerializer(patient_profile).data
+        new_key = RISK_COUNT_KEYS.get(patient_profile.risk_level)
+        old_key = RISK_COUNT_KEYS.get(old_risk_level)
+        newly_assigned = {doctor_topic(doctor_id) for doctor_id in newly_assigned_doctor_ids}
+        for topic in topics:
+            counts = {}
+            if topic in newly_assigned:
+                counts['total_patients'] = 1
+            elif old_key:
+                counts[old_key] = -1
+            if new_key:
+                counts[new_key] = counts.get(new_key, 0) + 1
+            counts = {key: delta for key, delta in counts.items() if delta}
+            hub.publish(topic, {'type': 'patient', 'data': {'counts': counts, 'patient': row}})
+
+    transaction.on_commit(send)
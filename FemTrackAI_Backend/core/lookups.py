@@ -0,0 +1,116 @@
+# core/lookups.py
+import threading
+
+from django.db import transaction
+
+
+def normalize_name(value):
+    """Canonical form of a lookup value: surrounding whitespace removed, blank values become None."""
+    if value is None:
+        return None
+    value = str(value).strip()
+    return value or None
+
+
+def choice_code(choices, label):
+    """
+    Integer code for a label of an IntegerChoices class (e.g. 'High Risk' -> RiskLevel.HIGH),
+    ignoring surrounding whitespace and case. Returns None for blank or unknown labels.
+    """
+    label = normalize_name(label)
+    if label is None:
+        return None
+    for code, choice_label in choices.choices:
+        if choice_label.upper() == label.upper():
+            return code
+    return None
+
+
+class LookupCache:
+    """
+    Id <-> name cache for one lookup table (Region, ScreeningType, RecommendedAction). Each process (server
+    worker, management command) fills its own copy on first use and never refreshes it.
+
+    That is safe because lookup rows are only ever added, never renamed or deleted: the API and the seeder
+    only create rows, and the admin (LookupTableAdmin) allows adding but not changing or deleting them.
+    Rows that already exist are cached as soon as they are read. A row created here enters the cache only once
+    its transaction has committed, so a rolled back insert can't leave a dangling id.
+    """
+
+    def __init__(self, model):
+        self.model = model
+        self._lock = threading.Lock()
+        self._names = {} # id -> name
+        self._ids = {} # name -> id
+        self._warm = False
+
+    def _store(self, rows):
+        # For rows that are already committed
+        with self._lock:
+            for pk, name in rows:
+                self._names[pk] = name
+                self._ids[name] = pk
+
+    def _remember_created(self, pk, name):
+        # A row created in the current transaction is only cached once it commits
+        transaction.on_commit(lambda: self._store([(pk, name)])) # Runs immediately outside a transaction
+
+    def _warm_up(self):
+        # First use in this process: the tables are small, so load them whole
+        if not self._warm:
+            self._warm = True
+            self._store(self.model.objects.values_list('id', 'name'))
+
+    def name(self, pk):
+        if pk is None:
+            return None
+        self._warm_up()
+        name = self._names.get(pk)
+        if name is None:
+            name = self.model.objects.filter(pk=pk).values_list('name', flat=True).first()
+            if name is not None:
+                self._store([(pk, name)])
+        return name
+
+    def id_for(self, name, create=True):
+        """Id of the row for `name` (normalized first), creating it if needed. None for blank names."""
+        name = normalize_name(name)
+        if name is None:
+            return None
+        self._warm_up()
+        pk = self._ids.get(name)
+        if pk is None:
+            created = False
+            if create:
+                row, created = self.model.objects.get_or_create(name=name)
+                pk = row.pk
+            else:
+                pk = self.model.objects.filter(name=name).values_list('id', flat=True).first()
+            if created:
+                self._remember_created(pk, name)
+            elif pk is not None:
+                self._store([(pk, name)])
+        return pk
+
+    def instance(self, name):
+        """Instance carrying just the id and name, enough to assign to a foreign key without another query."""
+        pk = self.id_for(name)
+        return None if pk is None else self.model(pk=pk, name=normalize_name(name))
+
+    def clear(self):
+        with self._lock:
+            self._names.clear()
+            self._ids.clear()
+            self._warm = False
+
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+def lookup_cache(model):
+    """Returns the shared LookupCache for a lookup model."""
+    with _caches_lock:
+        if model not in _caches:
+            _caches[model] = LookupCache(model)
+        return _caches[model]
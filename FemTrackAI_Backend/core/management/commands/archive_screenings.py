@@ -0,0 +1,45 @@
+# core/management/commands/archive_screenings.py
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from core.archive import archivable_screenings, archive_batch
+
+
+class Command(BaseCommand):
+    help = 'Moves screenings older than the archive horizon from ScreeningRecord to ArchivedScreeningRecord.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days', type=int, default=settings.SCREENING_ARCHIVE_AFTER_DAYS,
+            help='Archive screenings older than this many days (default: settings.SCREENING_ARCHIVE_AFTER_DAYS)'
+        )
+        parser.add_argument('--batch-size', type=int, default=1000, help='Screenings moved per transaction')
+        parser.add_argument('--dry-run', action='store_true', help='Only report how many screenings would be archived')
+
+    def handle(self, *args, **options):
+        if options['days'] < 0:
+            raise CommandError('--days must not be negative.')
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be at least 1.')
+
+        cutoff = timezone.localdate() - timedelta(days=options['days'])
+        self.stdout.write(self.style.SUCCESS(f'Archiving screenings dated before {cutoff}'))
+
+        if options['dry_run']:
+            count = archivable_screenings(cutoff).count()
+            self.stdout.write(self.style.WARNING(f'Dry run: {count} screening(s) would be archived.'))
+            return
+
+        # Each batch commits on its own, so an interrupted run keeps its progress and can simply be re-run
+        archived = 0
+        while True:
+            moved = archive_batch(cutoff, options['batch_size'])
+            if not moved:
+                break
+            archived += moved
+            self.stdout.write(f'Archived {archived} screening(s)...')
+
+        self.stdout.write(self.style.SUCCESS(f'Successfully archived {archived} screening(s).'))
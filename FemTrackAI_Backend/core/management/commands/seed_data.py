@@ -1,112 +1,267 @@
 # core/management/commands/seed_data.py
-import csv
-from django.core.management.base import BaseCommand
+import hashlib
+import os
+import pandas as pd
+from django.core.management.base import BaseCommand, CommandError
+from django.contrib.auth.hashers import make_password
 from django.db import transaction
-from core.models import User, PatientProfile, ScreeningRecord, DoctorProfile # Ensure DoctorProfile is imported
+from core.lookups import choice_code, lookup_cache
+from core.profiling import StageProfiler
+from core.models import (
+    User, PatientProfile, ScreeningRecord, ArchivedScreeningRecord, DoctorProfile, PatientAssignment, # Ensure DoctorProfile is imported
+    Region, ScreeningType, RecommendedAction, HpvResult, RiskLevel
+)
+from core.validation import validate_seed_rows
+
+# Columns of the processed CSV that end up in the database. The row fingerprint covers exactly these,
+# so a change to any seeded value marks the row as changed.
+SEED_COLUMNS = [
+    'Patient ID', 'Age', 'Sexual Partners', 'First Sexual Activity Age',
+    'Risk Level', 'HPV Test Result', 'Pap Smear Result', 'Smoking Status',
+    'STDs History', 'Region', 'Insrance Covered', 'Recommended Action',
+    'Screening Type Last'
+]
+
+
+def row_fingerprint(row):
+    """
+    Returns a stable SHA-256 hex digest of the seeded columns of a CSV row.
+    """
+    payload = '\x1f'.join(row.get(col) or '' for col in SEED_COLUMNS) # Unit separator can't appear in CSV values
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
 
 class Command(BaseCommand):
     help = 'Seeds the database with patient and screening data from a CSV file.'
 
     def add_arguments(self, parser):
         parser.add_argument('csv_file', type=str, help='The path to the processed CSV file (e.g., cervical_cancer_processed_data.csv)')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Rows validated and written per transaction')
+        parser.add_argument('--rejects', type=str, default=None, help='Write rows that fail validation, with the reasons, to this CSV file')
+        parser.add_argument(
+            '--profile', metavar='REPORT_JSON', default=None,
+            help='Write per-stage wall time, rows/sec and peak memory (tracemalloc) to this JSON file'
+        )
+        parser.add_argument('--cprofile', metavar='DUMP', default=None, help='With --profile, also write a cProfile dump')
+        parser.add_argument(
+            '--reuse-password-hash', action='store_true',
+            help='Hash the shared patient password once and store that hash for every new patient. '
+                 'Much faster, but all seeded patients then share one salt: only for throwaway test/benchmark databases'
+        )
 
     def handle(self, *args, **options):
         csv_file_path = options['csv_file']
+        if options['cprofile'] and not options['profile']:
+            raise CommandError('--cprofile requires --profile')
         self.stdout.write(self.style.SUCCESS(f'Attempting to seed data from: {csv_file_path}'))
 
+        # Hashing the default password dominates seeding time (see --profile); optionally do it only once
+        self.password_hash = make_password('testpassword123') if options['reuse_password_hash'] else None
+        self.profiler = StageProfiler('seed_data', enabled=bool(options['profile']), cprofile_path=options['cprofile'])
+        self.profiler.start()
         try:
-            with open(csv_file_path, newline='', encoding='utf-8') as csvfile:
-                reader = csv.DictReader(csvfile)
-                data = list(reader) # Read all rows into memory
-
-                # Create a default doctor account for seeding (if not exists)
-                # This doctor will be assigned to all seeded screenings for simplicity
-                doctor_user, created = User.objects.get_or_create(
-                    username='default_doctor',
-                    email='doctor@femtrack.com',
-                    user_type='doctor',
-                    defaults={'first_name': 'Default', 'last_name': 'Doctor', 'is_staff': True}
-                )
-                if created:
-                    doctor_user.set_password('password123') # Set a strong password in production
-                    doctor_user.save()
-                    DoctorProfile.objects.get_or_create(user=doctor_user)
-                    self.stdout.write(self.style.SUCCESS('Created default doctor: doctor@femtrack.com (password: password123)'))
-                else:
-                    self.stdout.write(self.style.WARNING('Default doctor already exists. Skipping creation.'))
-
-                default_doctor_profile = DoctorProfile.objects.get(user=doctor_user)
-
-
-                with transaction.atomic():
-                    for row in data:
-                        patient_id = row['Patient ID']
-                        email = f"{patient_id.lower()}@example.com" # Generate a unique email
-                        username = patient_id.lower()
-
-                        # Create or get User for Patient
-                        user, created = User.objects.get_or_create(
-                            username=username,
-                            defaults={
-                                'email': email,
-                                'user_type': 'patient',
-                                'password': 'testpassword123' # Set a default password
-                            }
-                        )
-                        if created:
-                            user.set_password('testpassword123') # Set password for new users
-                            user.save()
-                            self.stdout.write(self.style.SUCCESS(f'Created user: {username}'))
-
-                        # Create or get PatientProfile
-                        patient_profile, created = PatientProfile.objects.get_or_create(
-                            user=user,
-                            defaults={
-                                'age': int(row['Age']),
-                                'sexual_partners': int(row['Sexual Partners']),
-                                'first_sexual_activity_age': int(row['First Sexual Activity Age']),
-                                'risk_level': row['Risk Level'] # Use the pre-calculated risk level
-                            }
-                        )
-                        if created:
-                             self.stdout.write(self.style.SUCCESS(f'Created patient profile for {username}'))
-                        else:
-                            # Update existing profile with risk_level in case it changed
-                            patient_profile.age = int(row['Age'])
-                            patient_profile.sexual_partners = int(row['Sexual Partners'])
-                            patient_profile.first_sexual_activity_age = int(row['First Sexual Activity Age'])
-                            patient_profile.risk_level = row['Risk Level']
-                            patient_profile.save()
-                            self.stdout.write(self.style.WARNING(f'Updated patient profile for {username}'))
-
-
-                        # Create ScreeningRecord
-                        # Use a try-except for integer conversion for robustness
-                        try:
-                            # Adjust date formatting if needed, for simplicity use today's date if not specific
-                            # For the hackathon, we can use a generic date or parse if a date column exists.
-                            # Since the original CSV did not have a specific screening date, we'll use auto_now_add
-                            # in the model. If you need specific dates from CSV, add a date column to your CSV.
-                            ScreeningRecord.objects.create(
-                                patient=patient_profile,
-                                doctor=default_doctor_profile, # Assign to the default doctor
-                                screening_type=row['Screening Type Last'],
-                                hpv_test_result=row['HPV Test Result'],
-                                pap_smear_result=row['Pap Smear Result'],
-                                smoking_status=row['Smoking Status'],
-                                stds_history=row['STDs History'],
-                                region=row['Region'],
-                                insurance_covered=row['Insrance Covered'], # Corrected typo in column name
-                                recommended_action=row['Recommended Action'],
-                                assessment_risk_level=row['Risk Level'] # Risk level for this specific assessment
-                            )
-                            self.stdout.write(self.style.SUCCESS(f'Created screening record for {patient_id}'))
-                        except Exception as e:
-                            self.stdout.write(self.style.ERROR(f'Error creating screening record for {patient_id}: {e}'))
-
-                self.stdout.write(self.style.SUCCESS('Successfully seeded database!'))
+            self._seed(csv_file_path, options)
+        finally:
+            self.profiler.stop()
+        if options['profile']:
+            self.profiler.write_report(
+                options['profile'], csv_file=os.path.abspath(csv_file_path), batch_size=options['batch_size']
+            )
+            self.stdout.write(self.style.SUCCESS(f"Profile report written to {options['profile']}"))
+
+    def _seed(self, csv_file_path, options):
+        profiler = self.profiler
+        try:
+            # Read everything as text, blanks as '' rather than NaN, so values and fingerprints match the file exactly
+            batches = pd.read_csv(
+                csv_file_path, dtype=str, keep_default_na=False, encoding='utf-8', chunksize=options['batch_size']
+            )
+
+            # Create a default doctor account for seeding (if not exists)
+            # This doctor will be assigned to all seeded screenings for simplicity
+            doctor_user, created = User.objects.get_or_create(
+                username='default_doctor',
+                email='doctor@femtrack.com',
+                user_type='doctor',
+                defaults={'first_name': 'Default', 'last_name': 'Doctor', 'is_staff': True}
+            )
+            if created:
+                doctor_user.set_password('password123') # Set a strong password in production
+                doctor_user.save()
+                DoctorProfile.objects.get_or_create(user=doctor_user)
+                self.stdout.write(self.style.SUCCESS('Created default doctor: doctor@femtrack.com (password: password123)'))
+            else:
+                self.stdout.write(self.style.WARNING('Default doctor already exists. Skipping creation.'))
+
+            default_doctor_profile = DoctorProfile.objects.get(user=doctor_user)
+
+            counts = {'created': 0, 'updated': 0, 'unchanged': 0}
+            rejected_batches = []
+            seen_ids = set() # Patient IDs of earlier batches, so duplicates are caught across the whole file
+            while True:
+                with profiler.stage('read_csv') as stage:
+                    batch = next(batches, None)
+                    if batch is not None:
+                        stage.rows += len(batch)
+                if batch is None:
+                    break
+                profiler.rows += len(batch)
+
+                # Validate the whole batch up front; only rows that pass reach the database
+                with profiler.stage('validate') as stage:
+                    valid, rejected = validate_seed_rows(batch, seen_ids=seen_ids)
+                    stage.rows += len(batch)
+                if len(rejected):
+                    rejected_batches.append(rejected)
+                    for _, bad_row in rejected.iterrows():
+                        self.stdout.write(self.style.ERROR(f"Rejected {bad_row.get('Patient ID', '?')}: {bad_row['errors']}"))
+
+                rows = valid.to_dict('records')
+                if rows:
+                    with transaction.atomic():
+                        self._seed_batch(rows, default_doctor_profile, counts)
+
+            rejected_count = sum(len(rejected) for rejected in rejected_batches)
+            self.stdout.write(self.style.SUCCESS(
+                f"Rows created: {counts['created']}, updated: {counts['updated']}, "
+                f"unchanged: {counts['unchanged']}, rejected: {rejected_count}"
+            ))
+            if rejected_count and options['rejects']:
+                pd.concat(rejected_batches).to_csv(options['rejects'], index=False, encoding='utf-8')
+                self.stdout.write(self.style.WARNING(f"Rejected rows written to {options['rejects']}"))
+            self.stdout.write(self.style.SUCCESS('Successfully seeded database!'))
 
         except FileNotFoundError:
             self.stdout.write(self.style.ERROR(f'Error: CSV file not found at {csv_file_path}'))
         except Exception as e:
-            self.stdout.write(self.style.ERROR(f'An unexpected error occurred: {e}'))
\ No newline at end of file
+            self.stdout.write(self.style.ERROR(f'An unexpected error occurred: {e}'))
+
+    def _seed_batch(self, rows, default_doctor_profile, counts):
+        profiler = self.profiler
+        # Fingerprints of previously seeded rows in this batch, keyed by patient username, one query per table.
+        # Rows whose fingerprint is unchanged are skipped without touching the database. A seeded record may
+        # since have been archived (archive_screenings), in which case the archived copy is the one to update.
+        usernames = [row['Patient ID'].lower() for row in rows]
+        seeded = {}
+        with profiler.stage('fingerprint_lookup') as stage:
+            for model in (ArchivedScreeningRecord, ScreeningRecord):
+                for username, screening_id, fingerprint in model.objects.filter(
+                    source_fingerprint__isnull=False, patient__user__username__in=usernames
+                ).values_list('patient__user__username', 'id', 'source_fingerprint'):
+                    seeded[username] = (model, screening_id, fingerprint)
+
+            # Screenings seeded before fingerprints were stored have none. Adopt such a patient's first screening
+            # by the default doctor instead, so it is updated in place (and fingerprinted) rather than duplicated.
+            unfingerprinted = [username for username in usernames if username not in seeded]
+            if unfingerprinted:
+                for model in (ScreeningRecord, ArchivedScreeningRecord):
+                    for username, screening_id in model.objects.filter(
+                        source_fingerprint__isnull=True, doctor=default_doctor_profile,
+                        patient__user__username__in=unfingerprinted
+                    ).values_list('patient__user__username', 'id'):
+                        # Ids are shared by both tables; the lowest one is the screening seeded first
+                        if username not in seeded or screening_id < seeded[username][1]:
+                            seeded[username] = (model, screening_id, None)
+            stage.rows += len(rows)
+
+        seeded_profiles = []
+        with profiler.stage('db_write') as stage: # Includes password_hash
+            for row in rows:
+                self._seed_row(row, seeded, default_doctor_profile, counts, seeded_profiles)
+            stage.rows += len(rows)
+
+        # Put every seeded patient on the default doctor's panel, one INSERT per batch
+        with profiler.stage('assign_panel') as stage:
+            PatientAssignment.objects.bulk_create(
+                [PatientAssignment(doctor=default_doctor_profile, patient=profile) for profile in seeded_profiles],
+                ignore_conflicts=True
+            )
+            stage.rows += len(seeded_profiles)
+
+    def _seed_row(self, row, seeded, default_doctor_profile, counts, seeded_profiles):
+        # Writes one validated row, unless its fingerprint shows it is unchanged since the last run
+        patient_id = row['Patient ID']
+        email = f"{patient_id.lower()}@example.com" # Generate a unique email
+        username = patient_id.lower()
+
+        fingerprint = row_fingerprint(row)
+        previous = seeded.get(username)
+        if previous and previous[2] == fingerprint:
+            counts['unchanged'] += 1
+            return
+
+        # Create or get User for Patient
+        user, created = User.objects.get_or_create(
+            username=username,
+            defaults={
+                'email': email,
+                'user_type': 'patient',
+                'password': 'testpassword123' # Set a default password
+            }
+        )
+        if created:
+            with self.profiler.stage('password_hash') as stage:
+                if self.password_hash:
+                    user.password = self.password_hash
+                else:
+                    user.set_password('testpassword123') # Set password for new users
+                stage.rows += 1
+            user.save()
+            self.stdout.write(self.style.SUCCESS(f'Created user: {username}'))
+
+        # Create or get PatientProfile (numeric fields were checked by validate_seed_rows)
+        patient_profile, created = PatientProfile.objects.get_or_create(
+            user=user,
+            defaults={
+                'age': int(row['Age']),
+                'sexual_partners': int(row['Sexual Partners']),
+                'first_sexual_activity_age': int(row['First Sexual Activity Age']),
+                'risk_level': row['Risk Level'] # Use the pre-calculated risk level
+            }
+        )
+        if created:
+             self.stdout.write(self.style.SUCCESS(f'Created patient profile for {username}'))
+        else:
+            # Update existing profile with risk_level in case it changed
+            patient_profile.age = int(row['Age'])
+            patient_profile.sexual_partners = int(row['Sexual Partners'])
+            patient_profile.first_sexual_activity_age = int(row['First Sexual Activity Age'])
+            patient_profile.risk_level = row['Risk Level']
+            patient_profile.save()
+            self.stdout.write(self.style.WARNING(f'Updated patient profile for {username}'))
+
+
+        # Create or update the ScreeningRecord seeded from this row
+        # Adjust date formatting if needed, for simplicity use today's date if not specific
+        # For the hackathon, we can use a generic date or parse if a date column exists.
+        # Since the original CSV did not have a specific screening date, we'll use auto_now_add
+        # in the model. If you need specific dates from CSV, add a date column to your CSV.
+        # Categorical values are stored as lookup ids and integer codes (cached, so no query per row; a name
+        # first created in this batch is only cached once the batch commits)
+        screening_fields = {
+            'screening_type_id': lookup_cache(ScreeningType).id_for(row['Screening Type Last']),
+            'hpv_test_result': choice_code(HpvResult, row['HPV Test Result']),
+            'pap_smear_result': row['Pap Smear Result'],
+            'smoking_status': row['Smoking Status'],
+            'stds_history': row['STDs History'],
+            'region_id': lookup_cache(Region).id_for(row['Region']),
+            'insurance_covered': row['Insrance Covered'], # Corrected typo in column name
+            'recommended_action_id': lookup_cache(RecommendedAction).id_for(row['Recommended Action']),
+            'assessment_risk_level': choice_code(RiskLevel, row['Risk Level']), # Risk level for this specific assessment
+            'source_fingerprint': fingerprint,
+        }
+        if previous:
+            # The row changed since the last run: update its record in place instead of adding another
+            previous_model, previous_id, _ = previous
+            previous_model.objects.filter(pk=previous_id).update(**screening_fields)
+            counts['updated'] += 1
+            self.stdout.write(self.style.WARNING(f'Updated screening record for {patient_id}'))
+        else:
+            ScreeningRecord.objects.create(
+                patient=patient_profile,
+                doctor=default_doctor_profile, # Assign to the default doctor
+                **screening_fields
+            )
+            counts['created'] += 1
+            self.stdout.write(self.style.SUCCESS(f'Created screening record for {patient_id}'))
+        seeded_profiles.append(patient_profile)
@@ -0,0 +1,60 @@
+# core/management/commands/seed_snapshot.py
+import time
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.snapshots import (
+    SNAPSHOT_PASSWORD_NOTE, build_snapshot, default_cache_dir, install_snapshot, snapshot_key
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Builds (once) and caches a migrated, seeded SQLite database for a dataset and size, '
+        'and optionally copies it into place for a test run or benchmark.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('csv_file', type=str, help='The processed CSV to seed from (e.g., cervical_cancer_processed_data.csv)')
+        parser.add_argument(
+            '--rows', type=int, default=None,
+            help='Number of patients to seed; the rows seed_data accepts are repeated or cut to this size '
+                 '(default: the dataset as is)'
+        )
+        parser.add_argument('--output', type=str, default=None, help='Copy the snapshot to this database file')
+        parser.add_argument('--cache-dir', type=str, default=None, help=f'Snapshot cache directory (default: {default_cache_dir()})')
+        parser.add_argument('--rebuild', action='store_true', help='Rebuild the snapshot even if a cached one exists')
+
+    def handle(self, *args, **options):
+        dataset_path = Path(options['csv_file']).resolve()
+        if not dataset_path.is_file():
+            raise CommandError(f'CSV file not found at {dataset_path}')
+        if options['rows'] is not None and options['rows'] < 1:
+            raise CommandError('--rows must be at least 1.')
+
+        cache_dir = Path(options['cache_dir']) if options['cache_dir'] else default_cache_dir()
+        key = snapshot_key(dataset_path, options['rows'])
+        snapshot_path = cache_dir / f'{key}.sqlite3'
+
+        if snapshot_path.exists() and not options['rebuild']:
+            self.stdout.write(self.style.SUCCESS(f'Using cached snapshot {snapshot_path}'))
+        else:
+            self.stdout.write(self.style.WARNING(f'Building snapshot {key} (migrate + seed_data), this runs once...'))
+            log_path = cache_dir / f'{key}.log'
+            started = time.perf_counter()
+            try:
+                build_snapshot(dataset_path, options['rows'], snapshot_path, log_path)
+            except Exception as e:
+                raise CommandError(f'Building the snapshot failed: {e} (log: {log_path})')
+            log_path.unlink(missing_ok=True)
+            self.stdout.write(self.style.SUCCESS(
+                f'Built snapshot {snapshot_path} in {time.perf_counter() - started:.1f}s. {SNAPSHOT_PASSWORD_NOTE}'
+            ))
+
+        if options['output']:
+            started = time.perf_counter()
+            install_snapshot(snapshot_path, options['output'])
+            self.stdout.write(self.style.SUCCESS(
+                f"Copied snapshot to {options['output']} in {time.perf_counter() - started:.3f}s"
+            ))
@@ -0,0 +1,99 @@
+# Full-text index for patient search (see core/search.py).
+# SQLite only: other databases, and SQLite builds without FTS5 or its trigram tokenizer (added in 3.34), skip this
+# migration and fall back to plain ORM lookups.
+
+from django.db import OperationalError, migrations
+
+
+CREATE_SQL = [
+    # Trigram tokenizer: matches any substring of 3+ characters and lets us score fuzzy matches by shared trigrams.
+    # rowid is the patient's user id (PatientProfile's primary key).
+    """
+    CREATE VIRTUAL TABLE core_patientsearch USING fts5(
+        username, email, first_name, last_name, region, tokenize = 'trigram'
+    )
+    """,
+    """
+    INSERT INTO core_patientsearch (rowid, username, email, first_name, last_name, region)
+    SELECT u.id, u.username, u.email, u.first_name, u.last_name,
+           (SELECT s.region FROM core_screeningrecord s WHERE s.patient_id = p.user_id
+            ORDER BY s.screening_date DESC, s.id DESC LIMIT 1)
+    FROM core_patientprofile p INNER JOIN core_user u ON u.id = p.user_id
+    """,
+    # Triggers keep the index in sync with every write, including bulk updates and raw SQL.
+    """
+    CREATE TRIGGER core_patientsearch_profile_insert AFTER INSERT ON core_patientprofile BEGIN
+        INSERT INTO core_patientsearch (rowid, username, email, first_name, last_name, region)
+        SELECT id, username, email, first_name, last_name, NULL FROM core_user WHERE id = NEW.user_id;
+    END
+    """,
+    """
+    CREATE TRIGGER core_patientsearch_profile_delete AFTER DELETE ON core_patientprofile BEGIN
+        DELETE FROM core_patientsearch WHERE rowid = OLD.user_id;
+    END
+    """,
+    """
+    CREATE TRIGGER core_patientsearch_user_update
+    AFTER UPDATE OF username, email, first_name, last_name ON core_user BEGIN
+        UPDATE core_patientsearch
+        SET username = NEW.username, email = NEW.email, first_name = NEW.first_name, last_name = NEW.last_name
+        WHERE rowid = NEW.id;
+    END
+    """,
+    # A patient's searchable region is the one from their most recently written screening
+    """
+    CREATE TRIGGER core_patientsearch_screening_insert AFTER INSERT ON core_screeningrecord BEGIN
+        UPDATE core_patientsearch SET region = NEW.region WHERE rowid = NEW.patient_id;
+    END
+    """,
+    """
+    CREATE TRIGGER core_patientsearch_screening_update AFTER UPDATE OF region ON core_screeningrecord BEGIN
+        UPDATE core_patientsearch SET region = NEW.region WHERE rowid = NEW.patient_id;
+    END
+    """,
+]
+
+DROP_SQL = [
+    'DROP TRIGGER IF EXISTS core_patientsearch_screening_update',
+    'DROP TRIGGER IF EXISTS core_patientsearch_screening_insert',
+    'DROP TRIGGER IF EXISTS core_patientsearch_user_update',
+    'DROP TRIGGER IF EXISTS core_patientsearch_profile_delete',
+    'DROP TRIGGER IF EXISTS core_patientsearch_profile_insert',
+    'DROP TABLE IF EXISTS core_patientsearch',
+]
+
+
+def supports_trigram_index(connection):
+    """Whether this SQLite build can create an FTS5 table with the trigram tokenizer."""
+    with connection.cursor() as cursor:
+        try:
+            cursor.execute("CREATE VIRTUAL TABLE temp.core_trigram_probe USING fts5(probe, tokenize = 'trigram')")
+        except OperationalError:
+            return False
+        cursor.execute('DROP TABLE temp.core_trigram_probe')
+    return True
+
+
+def create_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite' or not supports_trigram_index(schema_editor.connection):
+        return
+    for sql in CREATE_SQL:
+        schema_editor.execute(sql)
+
+
+def drop_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for sql in DROP_SQL:
+        schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_screeningrecord_source_fingerprint'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
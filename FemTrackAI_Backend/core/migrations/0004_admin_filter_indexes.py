@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-19 01:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_patient_search_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='patientprofile',
+            index=models.Index(fields=['risk_level'], name='core_patient_risk_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='screeningrecord',
+            index=models.Index(fields=['patient', '-screening_date'], name='core_screening_latest_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='screeningrecord',
+            index=models.Index(fields=['screening_date'], name='core_screening_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='screeningrecord',
+            index=models.Index(fields=['region'], name='core_screening_region_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='screeningrecord',
+            index=models.Index(fields=['assessment_risk_level'], name='core_screening_risk_idx'),
+        ),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 5.2.18 on 2026-10-19 01:16
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def assign_from_screening_history(apps, schema_editor):
+    # Every doctor who has screened a patient gets that patient on their panel
+    ScreeningRecord = apps.get_model('core', 'ScreeningRecord')
+    PatientAssignment = apps.get_model('core', 'PatientAssignment')
+    pairs = (
+        ScreeningRecord.objects.filter(doctor__isnull=False)
+        .values_list('doctor_id', 'patient_id').distinct().order_by()
+    )
+    batch = []
+    for doctor_id, patient_id in pairs.iterator(chunk_size=2000):
+        batch.append(PatientAssignment(doctor_id=doctor_id, patient_id=patient_id))
+        if len(batch) >= 2000:
+            PatientAssignment.objects.bulk_create(batch, ignore_conflicts=True)
+            batch = []
+    PatientAssignment.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_admin_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PatientAssignment',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('assigned_at', models.DateTimeField(auto_now_add=True)),
+                ('doctor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='patient_assignments', to='core.doctorprofile')),
+                ('patient', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='doctor_assignments', to='core.patientprofile')),
+            ],
+        ),
+        migrations.AddField(
+            model_name='doctorprofile',
+            name='patients',
+            field=models.ManyToManyField(blank=True, related_name='doctors', through='core.PatientAssignment', to='core.patientprofile'),
+        ),
+        migrations.AddConstraint(
+            model_name='patientassignment',
+            constraint=models.UniqueConstraint(fields=('doctor', 'patient'), name='core_unique_patient_assignment'),
+        ),
+        migrations.RunPython(assign_from_screening_history, migrations.RunPython.noop),
+    ]
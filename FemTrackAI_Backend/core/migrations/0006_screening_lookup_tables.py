@@ -0,0 +1,248 @@
+# Moves the repeated categorical columns of ScreeningRecord into lookup tables (region, screening type,
+# recommended action) and integer-coded choices (HPV result, assessment risk level).
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+RISK_LEVELS = {'UNKNOWN': 0, 'LOW RISK': 1, 'MODERATE RISK': 2, 'HIGH RISK': 3}
+HPV_RESULTS = {'NEGATIVE': 0, 'POSITIVE': 1}
+
+LOOKUP_COLUMNS = [
+    # (old text column, new foreign key column, lookup model)
+    ('region', 'region_ref', 'Region'),
+    ('screening_type', 'screening_type_ref', 'ScreeningType'),
+    ('recommended_action', 'recommended_action_ref', 'RecommendedAction'),
+]
+CODED_COLUMNS = [
+    # (old text column, new integer column, label -> code, code for blank values)
+    ('hpv_test_result', 'hpv_test_result_code', HPV_RESULTS, None),
+    ('assessment_risk_level', 'assessment_risk_level_code', RISK_LEVELS, 0),
+]
+
+
+def _clean(value):
+    value = (value or '').strip()
+    return value or None
+
+
+def _unconvertible_values(ScreeningRecord, apps):
+    # Values the conversion could not keep as they are: names longer than the lookup column, and non-blank
+    # labels that map to no code. Blank values are fine (they become NULL, or Unknown for the risk level).
+    problems = []
+    for old, _, model_name in LOOKUP_COLUMNS:
+        max_length = apps.get_model('core', model_name)._meta.get_field('name').max_length
+        for raw in ScreeningRecord.objects.values_list(old, flat=True).distinct().order_by():
+            name = _clean(raw)
+            if name is not None and len(name) > max_length:
+                problems.append(f'{old}: {name[:60]!r}... is {len(name)} characters, the limit is {max_length}')
+    for old, _, codes, _ in CODED_COLUMNS:
+        for raw in ScreeningRecord.objects.values_list(old, flat=True).distinct().order_by():
+            label = _clean(raw)
+            if label is not None and label.upper() not in codes:
+                problems.append(f'{old}: {label!r} is not one of {", ".join(codes)}')
+    return problems
+
+
+def to_lookups(apps, schema_editor):
+    ScreeningRecord = apps.get_model('core', 'ScreeningRecord')
+    problems = _unconvertible_values(ScreeningRecord, apps)
+    if problems:
+        # Refuse rather than truncate or drop data; nothing has been written yet
+        raise ValueError(
+            'Cannot convert these screening record values without losing data; correct them and migrate again:\n  '
+            + '\n  '.join(problems)
+        )
+
+    # One UPDATE per distinct raw value; there are only a handful per column
+    for old, new, model_name in LOOKUP_COLUMNS:
+        Lookup = apps.get_model('core', model_name)
+        for raw in ScreeningRecord.objects.values_list(old, flat=True).distinct().order_by():
+            name = _clean(raw)
+            if name is None:
+                continue
+            lookup, _ = Lookup.objects.get_or_create(name=name)
+            ScreeningRecord.objects.filter(**{old: raw}).update(**{new: lookup.pk})
+        if model_name == 'ScreeningType':
+            # screening_type was required; give legacy blank values an explicit lookup row
+            blank, _ = Lookup.objects.get_or_create(name='UNSPECIFIED')
+            ScreeningRecord.objects.filter(**{f'{new}__isnull': True}).update(**{new: blank.pk})
+
+    for old, new, codes, blank_code in CODED_COLUMNS:
+        for raw in ScreeningRecord.objects.values_list(old, flat=True).distinct().order_by():
+            label = _clean(raw)
+            code = blank_code if label is None else codes[label.upper()]
+            ScreeningRecord.objects.filter(**{old: raw}).update(**{new: code})
+
+
+def from_lookups(apps, schema_editor):
+    ScreeningRecord = apps.get_model('core', 'ScreeningRecord')
+    for old, new, model_name in LOOKUP_COLUMNS:
+        Lookup = apps.get_model('core', model_name)
+        for lookup in Lookup.objects.all():
+            ScreeningRecord.objects.filter(**{new: lookup.pk}).update(**{old: lookup.name})
+    labels = {'hpv_test_result_code': ['NEGATIVE', 'POSITIVE'],
+              'assessment_risk_level_code': ['Unknown', 'Low Risk', 'Moderate Risk', 'High Risk']}
+    for old, new, _, _ in CODED_COLUMNS:
+        for code, label in enumerate(labels[new]):
+            ScreeningRecord.objects.filter(**{new: code}).update(**{old: label})
+
+
+# Rebuilding core_screeningrecord drops its triggers, so the search index triggers from 0003 are recreated here,
+# now resolving the region name through the lookup table.
+SEARCH_TRIGGERS_SQL = [
+    'DROP TRIGGER IF EXISTS core_patientsearch_screening_insert',
+    'DROP TRIGGER IF EXISTS core_patientsearch_screening_update',
+    """
+    CREATE TRIGGER core_patientsearch_screening_insert AFTER INSERT ON core_screeningrecord BEGIN
+        UPDATE core_patientsearch SET region = (SELECT name FROM core_region WHERE id = NEW.region_id)
+        WHERE rowid = NEW.patient_id;
+    END
+    """,
+    """
+    CREATE TRIGGER core_patientsearch_screening_update AFTER UPDATE OF region_id ON core_screeningrecord BEGIN
+        UPDATE core_patientsearch SET region = (SELECT name FROM core_region WHERE id = NEW.region_id)
+        WHERE rowid = NEW.patient_id;
+    END
+    """,
+    # Refresh indexed regions with the trimmed names
+    """
+    UPDATE core_patientsearch SET region = (
+        SELECT r.name FROM core_screeningrecord s LEFT JOIN core_region r ON r.id = s.region_id
+        WHERE s.patient_id = core_patientsearch.rowid
+        ORDER BY s.screening_date DESC, s.id DESC LIMIT 1
+    )
+    """,
+]
+
+LEGACY_SEARCH_TRIGGERS_SQL = [
+    'DROP TRIGGER IF EXISTS core_patientsearch_screening_insert',
+    'DROP TRIGGER IF EXISTS core_patientsearch_screening_update',
+    """
+    CREATE TRIGGER core_patientsearch_screening_insert AFTER INSERT ON core_screeningrecord BEGIN
+        UPDATE core_patientsearch SET region = NEW.region WHERE rowid = NEW.patient_id;
+    END
+    """,
+    """
+    CREATE TRIGGER core_patientsearch_screening_update AFTER UPDATE OF region ON core_screeningrecord BEGIN
+        UPDATE core_patientsearch SET region = NEW.region WHERE rowid = NEW.patient_id;
+    END
+    """,
+]
+
+
+def _run_sqlite(statements):
+    def run(apps, schema_editor):
+        # Only where 0003 created the index; it skips SQLite builds without the FTS5 trigram tokenizer
+        if schema_editor.connection.vendor != 'sqlite':
+            return
+        if 'core_patientsearch' not in schema_editor.connection.introspection.table_names():
+            return
+        for sql in statements:
+            schema_editor.execute(sql)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_patient_assignment'),
+    ]
+
+    operations = [
+        # Undoing this migration rebuilds the table again; restore the original triggers as the very last step
+        migrations.RunPython(migrations.RunPython.noop, _run_sqlite(LEGACY_SEARCH_TRIGGERS_SQL)),
+        migrations.CreateModel(
+            name='Region',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True)),
+            ],
+            options={
+                'ordering': ['name'],
+                'abstract': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='ScreeningType',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True)),
+            ],
+            options={
+                'ordering': ['name'],
+                'abstract': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='RecommendedAction',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255, unique=True)),
+            ],
+            options={
+                'ordering': ['name'],
+                'abstract': False,
+            },
+        ),
+        migrations.RemoveIndex(
+            model_name='screeningrecord',
+            name='core_screening_region_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='screeningrecord',
+            name='core_screening_risk_idx',
+        ),
+        migrations.AddField(
+            model_name='screeningrecord',
+            name='region_ref',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='core.region'),
+        ),
+        migrations.AddField(
+            model_name='screeningrecord',
+            name='screening_type_ref',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='core.screeningtype'),
+        ),
+        migrations.AddField(
+            model_name='screeningrecord',
+            name='recommended_action_ref',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='core.recommendedaction'),
+        ),
+        migrations.AddField(
+            model_name='screeningrecord',
+            name='hpv_test_result_code',
+            field=models.PositiveSmallIntegerField(blank=True, choices=[(0, 'NEGATIVE'), (1, 'POSITIVE')], null=True),
+        ),
+        migrations.AddField(
+            model_name='screeningrecord',
+            name='assessment_risk_level_code',
+            field=models.PositiveSmallIntegerField(choices=[(0, 'Unknown'), (1, 'Low Risk'), (2, 'Moderate Risk'), (3, 'High Risk')], default=0),
+        ),
+        migrations.RunPython(to_lookups, from_lookups),
+        # Lets the reverse migration re-add the text column before from_lookups refills it
+        migrations.AlterField(
+            model_name='screeningrecord',
+            name='screening_type',
+            field=models.CharField(default='', max_length=50),
+        ),
+        migrations.RemoveField(model_name='screeningrecord', name='region'),
+        migrations.RemoveField(model_name='screeningrecord', name='screening_type'),
+        migrations.RemoveField(model_name='screeningrecord', name='recommended_action'),
+        migrations.RemoveField(model_name='screeningrecord', name='hpv_test_result'),
+        migrations.RemoveField(model_name='screeningrecord', name='assessment_risk_level'),
+        migrations.RenameField(model_name='screeningrecord', old_name='region_ref', new_name='region'),
+        migrations.RenameField(model_name='screeningrecord', old_name='screening_type_ref', new_name='screening_type'),
+        migrations.RenameField(model_name='screeningrecord', old_name='recommended_action_ref', new_name='recommended_action'),
+        migrations.RenameField(model_name='screeningrecord', old_name='hpv_test_result_code', new_name='hpv_test_result'),
+        migrations.RenameField(model_name='screeningrecord', old_name='assessment_risk_level_code', new_name='assessment_risk_level'),
+        migrations.AlterField(
+            model_name='screeningrecord',
+            name='screening_type',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='+', to='core.screeningtype'),
+        ),
+        migrations.AddIndex(
+            model_name='screeningrecord',
+            index=models.Index(fields=['assessment_risk_level'], name='core_screening_risk_idx'),
+        ),
+        migrations.RunPython(_run_sqlite(SEARCH_TRIGGERS_SQL), migrations.RunPython.noop),
+    ]
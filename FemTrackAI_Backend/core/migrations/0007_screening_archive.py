@@ -0,0 +1,38 @@
+# Generated by Django 5.2.18 on 2026-10-19 01:25
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_screening_lookup_tables'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedScreeningRecord',
+            fields=[
+                ('hpv_test_result', models.PositiveSmallIntegerField(blank=True, choices=[(0, 'NEGATIVE'), (1, 'POSITIVE')], null=True)),
+                ('pap_smear_result', models.CharField(blank=True, max_length=20, null=True)),
+                ('smoking_status', models.CharField(blank=True, max_length=5, null=True)),
+                ('stds_history', models.CharField(blank=True, max_length=5, null=True)),
+                ('insurance_covered', models.CharField(blank=True, max_length=5, null=True)),
+                ('assessment_risk_level', models.PositiveSmallIntegerField(choices=[(0, 'Unknown'), (1, 'Low Risk'), (2, 'Moderate Risk'), (3, 'High Risk')], default=0)),
+                ('source_fingerprint', models.CharField(blank=True, editable=False, max_length=64, null=True)),
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('screening_date', models.DateField()),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+                ('doctor', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='core.doctorprofile')),
+                ('patient', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_screenings', to='core.patientprofile')),
+                ('recommended_action', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='core.recommendedaction')),
+                ('region', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='core.region')),
+                ('screening_type', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='+', to='core.screeningtype')),
+            ],
+            options={
+                'ordering': ['-screening_date'],
+                'abstract': False,
+            },
+        ),
+    ]
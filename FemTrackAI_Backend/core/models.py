@@ -36,6 +36,11 @@ class PatientProfile(models.Model):
     # For initial seeding, we'll use the 'Risk Level' from the CSV
     risk_level = models.CharField(max_length=20, default='Unknown')
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['risk_level'], name='core_patient_risk_idx'), # Dashboard counts, admin filter
+        ]
+
     def __str__(self):
         return f"Profile for {self.user.email}"
 
@@ -43,33 +48,124 @@ class DoctorProfile(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name='doctor_profile')
     # Add any specific doctor fields here, e.g., specialization, license_number
     specialization = models.CharField(max_length=100, blank=True, null=True)
+    # The doctor's panel: the patients they look after (see PatientAssignment)
+    patients = models.ManyToManyField('PatientProfile', through='PatientAssignment', related_name='doctors', blank=True)
 
     def __str__(self):
         return f"Dr. {self.user.first_name} {self.user.last_name}"
 
-class ScreeningRecord(models.Model):
+
+class PatientAssignment(models.Model):
+    # A patient on a doctor's panel. Doctor dashboards, counts and screening lists are scoped through this table,
+    # so their cost follows the panel size rather than the size of the whole registry.
+    doctor = models.ForeignKey(DoctorProfile, on_delete=models.CASCADE, related_name='patient_assignments')
+    patient = models.ForeignKey('PatientProfile', on_delete=models.CASCADE, related_name='doctor_assignments')
+    assigned_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            # Also serves as the (doctor, patient) index used by the panel joins
+            models.UniqueConstraint(fields=['doctor', 'patient'], name='core_unique_patient_assignment'),
+        ]
+
+    def __str__(self):
+        return f"{self.patient.user.email} on panel of {self.doctor.user.email}"
+
+# Integer-coded categorical columns. The labels are what the API, exports and PatientProfile.risk_level use.
+class RiskLevel(models.IntegerChoices):
+    UNKNOWN = 0, 'Unknown'
+    LOW = 1, 'Low Risk'
+    MODERATE = 2, 'Moderate Risk'
+    HIGH = 3, 'High Risk'
+
+
+class HpvResult(models.IntegerChoices):
+    NEGATIVE = 0, 'NEGATIVE'
+    POSITIVE = 1, 'POSITIVE'
+
+
+class LookupTable(models.Model):
+    # Small table of the distinct values of a free-text category, referenced by integer id from ScreeningRecord.
+    # Names are stored trimmed, so variants like 'Pumwani ' and 'Pumwani' share one row (see core/lookups.py).
+    name = models.CharField(max_length=100, unique=True)
+
+    class Meta:
+        abstract = True
+        ordering = ['name']
+
+    def __str__(self):
+        return self.name
+
+
+class Region(LookupTable):
+    pass
+
+
+class ScreeningType(LookupTable):
+    name = models.CharField(max_length=50, unique=True) # e.g., 'PAP SMEAR', 'HPV DNA', 'VIA'
+
+
+class RecommendedAction(LookupTable):
+    name = models.CharField(max_length=255, unique=True) # Standardized action
+
+
+class ScreeningFields(models.Model):
+    # Columns shared by live screenings (ScreeningRecord) and archived ones (ArchivedScreeningRecord)
     patient = models.ForeignKey(PatientProfile, on_delete=models.CASCADE, related_name='screenings')
     screening_date = models.DateField(auto_now_add=True) # Automatically set on creation
-    screening_type = models.CharField(max_length=50) # e.g., 'PAP SMEAR', 'HPV DNA', 'VIA'
-    hpv_test_result = models.CharField(max_length=20, blank=True, null=True) # 'POSITIVE', 'NEGATIVE'
+    screening_type = models.ForeignKey(ScreeningType, on_delete=models.PROTECT, related_name='+')
+    hpv_test_result = models.PositiveSmallIntegerField(choices=HpvResult.choices, blank=True, null=True)
     pap_smear_result = models.CharField(max_length=20, blank=True, null=True) # 'Y', 'N'
     smoking_status = models.CharField(max_length=5, blank=True, null=True) # 'Y', 'N'
     stds_history = models.CharField(max_length=5, blank=True, null=True) # 'Y', 'N'
-    region = models.CharField(max_length=100, blank=True, null=True)
+    region = models.ForeignKey(Region, on_delete=models.PROTECT, blank=True, null=True, related_name='+')
     insurance_covered = models.CharField(max_length=5, blank=True, null=True) # 'Y', 'N'
-    recommended_action = models.TextField(blank=True, null=True) # Standardized action
+    recommended_action = models.ForeignKey(RecommendedAction, on_delete=models.PROTECT, blank=True, null=True, related_name='+')
     # This result could be derived from the screening results and other factors
     # It reflects the risk associated with this specific screening
-    assessment_risk_level = models.CharField(max_length=20, default='Unknown')
+    assessment_risk_level = models.PositiveSmallIntegerField(choices=RiskLevel.choices, default=RiskLevel.UNKNOWN)
     doctor = models.ForeignKey(DoctorProfile, on_delete=models.SET_NULL, null=True, blank=True, related_name='assessments_made')
-
+    # SHA-256 of the source CSV row this record was seeded from (None for records created through the API).
+    # seed_data compares it on re-runs so unchanged rows are skipped instead of duplicated.
+    source_fingerprint = models.CharField(max_length=64, blank=True, null=True, editable=False)
 
     class Meta:
+        abstract = True
         ordering = ['-screening_date'] # Order by most recent screening first
 
+
+class ScreeningRecord(ScreeningFields):
+    # The hot table: recent screenings plus every patient's latest one (see ArchivedScreeningRecord)
+
+    class Meta(ScreeningFields.Meta):
+        indexes = [
+            # Latest screening per patient (patient.screenings.first())
+            models.Index(fields=['patient', '-screening_date'], name='core_screening_latest_idx'),
+            # Admin list filters (region is a foreign key and indexed as such)
+            models.Index(fields=['screening_date'], name='core_screening_date_idx'),
+            models.Index(fields=['assessment_risk_level'], name='core_screening_risk_idx'),
+        ]
+
     def __str__(self):
         return f"Screening for {self.patient.user.email} on {self.screening_date}"
 
+
+class ArchivedScreeningRecord(ScreeningFields):
+    # Screenings moved out of ScreeningRecord by the archive_screenings command once they are older than the
+    # archive horizon. A patient's latest screening is never archived, so their risk level and last screening
+    # date are still read from the hot table alone. Rows keep the id they had in ScreeningRecord.
+    id = models.BigIntegerField(primary_key=True)
+    patient = models.ForeignKey(PatientProfile, on_delete=models.CASCADE, related_name='archived_screenings')
+    screening_date = models.DateField() # Copied from the live record, not reset on archiving
+    doctor = models.ForeignKey(DoctorProfile, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta(ScreeningFields.Meta):
+        pass
+
+    def __str__(self):
+        return f"Archived screening for {self.patient.user.email} on {self.screening_date}"
+
 # Future Models (for later steps in the hackathon):
 # class Appointment(models.Model):
 #     patient = models.ForeignKey(PatientProfile, on_delete=models.CASCADE)
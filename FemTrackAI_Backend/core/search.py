@@ -0,0 +1,147 @@
+# core/search.py
+from django.db import connection
+from django.db.models import Q
+
+# Full-text index maintained by migration 0003 (SQLite FTS5, trigram tokenizer)
+SEARCH_TABLE = 'core_patientsearch'
+SEARCH_FIELDS = ['username', 'email', 'first_name', 'last_name', 'region']
+
+# Candidates fetched from the index before fuzzy scoring, and the share of the query's
+# trigrams a field must contain to count as a fuzzy match
+FUZZY_CANDIDATES = 200
+FUZZY_THRESHOLD = 0.5
+# Scopes (doctor panels) up to this many patients are searched by reading their index rows directly
+SCAN_SCOPE_LIMIT = 5000
+
+_index_available = False # Set once the index has been seen; it is never dropped while the server runs
+
+
+def has_search_index():
+    """
+    Whether the FTS5 index exists. Migration 0003 skips it on databases other than SQLite and on SQLite builds
+    without the trigram tokenizer (before 3.34).
+    """
+    global _index_available
+    if not _index_available and connection.vendor == 'sqlite':
+        _index_available = SEARCH_TABLE in connection.introspection.table_names()
+    return _index_available
+
+
+def _trigrams(text):
+    text = (text or '').lower()
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def _quote(term):
+    # FTS5 string literal: wrap in double quotes, double any embedded ones
+    return '"' + term.replace('"', '""') + '"'
+
+
+def _scope_sql(queryset):
+    """
+    Returns the SQL and params of the rowids `queryset` covers, or None when the queryset is unfiltered
+    (so the whole registry is never materialized as a subquery).
+    """
+    if not queryset.query.where:
+        return None, []
+    sql, params = queryset.values('pk').query.sql_with_params()
+    return sql, list(params)
+
+
+def _is_small_scope(queryset):
+    # Counts at most SCAN_SCOPE_LIMIT + 1 rows, so deciding stays cheap on large panels too
+    return bool(queryset.query.where) and queryset.values('pk')[:SCAN_SCOPE_LIMIT + 1].count() <= SCAN_SCOPE_LIMIT
+
+
+def _index_matches(substrings, queryset, limit, small_scope=False):
+    """
+    Up to `limit` index rows (rowid and SEARCH_FIELDS) containing any of `substrings` in any field, within `queryset`.
+    No ORDER BY: ranking would score every match, while an unordered LIMIT stops at the first `limit` hits.
+    """
+    scope, params = _scope_sql(queryset)
+    if small_scope:
+        # A small scope (e.g. one doctor's panel) is cheaper to read row by row than to filter a full-text match
+        # that may hit most of the registry
+        contains = ' OR '.join(
+            f'instr(lower(coalesce({field}, \'\')), %s) > 0' for _ in substrings for field in SEARCH_FIELDS
+        )
+        sql = f"WHERE rowid IN ({scope}) AND ({contains})"
+        params += [substring.lower() for substring in substrings for _ in SEARCH_FIELDS]
+    else:
+        # The unary + keeps SQLite from handing each rowid of the scope to FTS5 as a separate lookup;
+        # the full-text match runs once and its hits are checked against the scope instead
+        sql = f"WHERE {SEARCH_TABLE} MATCH %s" + (f" AND +rowid IN ({scope})" if scope else '')
+        params = [' OR '.join(_quote(substring) for substring in substrings)] + params
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT rowid, {', '.join(SEARCH_FIELDS)} FROM {SEARCH_TABLE} {sql} LIMIT %s", [*params, limit]
+        )
+        return cursor.fetchall()
+
+
+def _fuzzy_substrings(query):
+    """
+    Candidate filter for typo-tolerant matching: the query's two halves, either of which a candidate must contain.
+    A single typo leaves at least one half intact, and each half ANDs several adjacent trigrams, so the filter
+    stays selective instead of matching every row that shares any one trigram with the query.
+    """
+    middle = len(query) // 2
+    return sorted({query[:middle], query[middle:]})
+
+
+def _ranked_ids(query, queryset, limit):
+    # 1. Usernames (Patient IDs) starting with the query, through the unique index on core_user.username
+    lowered = query.lower()
+    ids = list(
+        queryset.filter(user__username__gte=lowered, user__username__lt=lowered + '\U0010ffff')
+        .order_by('user__username').values_list('pk', flat=True)[:limit]
+    )
+    if len(ids) >= limit:
+        return ids
+
+    # 2. Substring matches in any field
+    small_scope = _is_small_scope(queryset)
+    for rowid, *_ in _index_matches([query], queryset, limit, small_scope):
+        if rowid not in ids and len(ids) < limit:
+            ids.append(rowid)
+    if ids:
+        return ids # Fuzzy matches are only a fallback for queries nothing contains
+
+    # 3. Fuzzy matches: candidates containing half of the query, rescored by trigram overlap.
+    # Queries under 6 characters have halves shorter than a trigram, which the index can't look up.
+    if len(query) < 6:
+        return ids
+    query_trigrams = _trigrams(query)
+    scored = []
+    for rowid, *values in _index_matches(_fuzzy_substrings(query), queryset, FUZZY_CANDIDATES, small_scope):
+        score = max(len(query_trigrams & _trigrams(value)) / len(query_trigrams) for value in values)
+        if score >= FUZZY_THRESHOLD:
+            scored.append((score, rowid))
+    scored.sort(key=lambda item: -item[0])
+    return [rowid for _, rowid in scored[:limit]]
+
+
+def search_patients(queryset, query, limit=20):
+    """
+    Returns up to `limit` patient profiles from `queryset` matching `query` by Patient ID (username),
+    email, first/last name or region, best matches first.
+
+    Patient IDs starting with the query come first, then other substring matches; only when nothing contains the
+    query are fuzzy (typo-tolerant) matches returned. The lookup goes through the FTS5 trigram index; queries
+    shorter than a trigram, and databases without the index (see has_search_index), fall back to prefix lookups.
+    """
+    query = query.strip()
+    if not query:
+        return []
+
+    if len(query) >= 3 and has_search_index():
+        ids = _ranked_ids(query, queryset, limit)
+        by_id = queryset.select_related('user').in_bulk(ids)
+        return [by_id[pk] for pk in ids if pk in by_id]
+
+    return list(
+        queryset.select_related('user').filter(
+            Q(user__username__istartswith=query) | Q(user__email__istartswith=query) |
+            Q(user__first_name__istartswith=query) | Q(user__last_name__istartswith=query)
+        ).order_by('user__username')[:limit]
+    )
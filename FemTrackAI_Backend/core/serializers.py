@@ -1,6 +1,68 @@
 # core/serializers.py
 from rest_framework import serializers
-from .models import User, PatientProfile, DoctorProfile, ScreeningRecord
+from .lookups import choice_code, lookup_cache, normalize_name
+from .models import (
+    User, PatientProfile, DoctorProfile, ScreeningRecord, ArchivedScreeningRecord,
+    Region, ScreeningType, RecommendedAction, HpvResult, RiskLevel
+)
+
+
+class LookupNameField(serializers.Field):
+    """
+    Exposes a foreign key to a lookup table (Region, ScreeningType, RecommendedAction) as the row's name.
+    Names are resolved through the shared lookup cache, so listing screenings needs no joins. Validation only
+    normalizes the name; the serializer's create()/update() resolve it with resolve(), which adds an unseen
+    name to the lookup table, so a request that fails validation leaves no lookup rows behind.
+    """
+    default_error_messages = {'invalid': 'Not a valid string.'}
+
+    def __init__(self, model, **kwargs):
+        self.model = model
+        super().__init__(**kwargs)
+
+    def get_attribute(self, instance):
+        return getattr(instance, f'{self.source}_id') # The raw id; don't load the related row
+
+    def to_representation(self, value):
+        return lookup_cache(self.model).name(value)
+
+    def to_internal_value(self, data):
+        if not isinstance(data, str):
+            self.fail('invalid')
+        name = normalize_name(data)
+        if name is None and not self.allow_null:
+            self.fail('required') # A blank name would reach the non-null column as NULL
+        max_length = self.model._meta.get_field('name').max_length
+        if name is not None and len(name) > max_length:
+            raise serializers.ValidationError(f'Ensure this field has no more than {max_length} characters.')
+        return name
+
+    def resolve(self, name):
+        """The lookup row for a validated name (created if new), ready to assign to the foreign key."""
+        return lookup_cache(self.model).instance(name)
+
+
+class LabelChoiceField(serializers.ChoiceField):
+    """
+    ChoiceField for an integer-coded field that reads and writes the choice labels ('POSITIVE', 'High Risk'),
+    so the API keeps the values it returned before the columns were coded.
+    """
+    def __init__(self, choices_class, **kwargs):
+        self.choices_class = choices_class
+        super().__init__(choices=choices_class.choices, **kwargs)
+
+    def to_representation(self, value):
+        if value in ('', None):
+            return value
+        return self.choices_class(value).label
+
+    def to_internal_value(self, data):
+        if data == '' and self.allow_blank:
+            return None
+        code = choice_code(self.choices_class, data) if isinstance(data, str) else None
+        if code is None:
+            self.fail('invalid_choice', input=data)
+        return code
 
 class UserSerializer(serializers.ModelSerializer):
     class Meta:
@@ -43,6 +105,12 @@ class ScreeningRecordSerializer(serializers.ModelSerializer):
     # Optionally, display patient's user email instead of just patient ID
     patient_email = serializers.CharField(source='patient.user.email', read_only=True)
     doctor_email = serializers.CharField(source='doctor.user.email', read_only=True)
+    # Categorical columns are stored as lookup ids and integer codes but still read and written as text
+    screening_type = LookupNameField(ScreeningType)
+    region = LookupNameField(Region, required=False, allow_null=True)
+    recommended_action = LookupNameField(RecommendedAction, required=False, allow_null=True)
+    hpv_test_result = LabelChoiceField(HpvResult, required=False, allow_null=True, allow_blank=True)
+    assessment_risk_level = LabelChoiceField(RiskLevel, read_only=True)
 
     class Meta:
         model = ScreeningRecord
@@ -55,6 +123,26 @@ class ScreeningRecordSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ['screening_date', 'patient_email', 'doctor_email', 'assessment_risk_level'] # Date is auto_now_add, risk level will be set by backend logic
 
+    def _resolve_lookups(self, validated_data):
+        # Validation passed: only now turn the lookup names into rows (creating new ones)
+        for field in self.fields.values():
+            if isinstance(field, LookupNameField) and field.source in validated_data:
+                validated_data[field.source] = field.resolve(validated_data[field.source])
+        return validated_data
+
+    def create(self, validated_data):
+        return super().create(self._resolve_lookups(validated_data))
+
+    def update(self, instance, validated_data):
+        return super().update(instance, self._resolve_lookups(validated_data))
+
+
+class ArchivedScreeningRecordSerializer(ScreeningRecordSerializer):
+    # Read-only view of an archived screening; returned by the screenings list with ?include_archived=true
+    class Meta(ScreeningRecordSerializer.Meta):
+        model = ArchivedScreeningRecord
+        fields = ScreeningRecordSerializer.Meta.fields + ['archived_at']
+
 
 # Serializer for patient-specific view (e.g., for 'My Risk Report')
 class PatientRiskReportSerializer(serializers.ModelSerializer):
@@ -87,5 +175,7 @@ class DoctorPatientListSerializer(serializers.ModelSerializer):
         return obj.user.username if obj.user.username else obj.user.email
 
     def get_last_assessment_date(self, obj):
+        if hasattr(obj, 'latest_screening_date'): # Annotated by the doctor dashboard query
+            return obj.latest_screening_date
         last_screening = obj.screenings.first()
         return last_screening.screening_date if last_screening else None
\ No newline at end of file
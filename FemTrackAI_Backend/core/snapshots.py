@@ -0,0 +1,138 @@
+# core/snapshots.py
+# Seeded template databases for tests and benchmarks: migrate + seed_data once per (migrations, dataset, size),
+# then copy the cached SQLite file into place for every run.
+import hashlib
+import os
+import shutil
+import sqlite3
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+import pandas as pd
+from django.conf import settings
+from django.db.migrations.loader import MigrationLoader
+
+from .validation import validate_seed_rows
+
+# Source files whose changes alter what ends up in a seeded database, on top of the migrations themselves
+SEEDER_SOURCES = [
+    'core/management/commands/seed_data.py', 'core/validation.py', 'core/lookups.py', 'core/snapshots.py'
+]
+
+SNAPSHOT_PASSWORD_NOTE = 'Seeded patients share the hash of testpassword123 (seed_data --reuse-password-hash).'
+
+
+def default_cache_dir():
+    """Snapshots are keyed by content, so one cache can be shared by every checkout of the project."""
+    base = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return Path(base) / 'femtrack' / 'snapshots'
+
+
+def _hash_file(digest, path):
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+
+
+def migration_state_hash():
+    """
+    SHA-256 over every migration known to Django (app, name and file contents), so adding, removing or
+    editing any migration, ours or a dependency's, gives a different snapshot key.
+    """
+    loader = MigrationLoader(None, ignore_no_migrations=True)
+    digest = hashlib.sha256()
+    for key in sorted(loader.disk_migrations):
+        digest.update(f'{key[0]}.{key[1]}\n'.encode('utf-8'))
+        module = sys.modules.get(loader.disk_migrations[key].__module__)
+        if module is not None and getattr(module, '__file__', None):
+            _hash_file(digest, module.__file__)
+    for source in SEEDER_SOURCES:
+        _hash_file(digest, Path(settings.BASE_DIR) / source)
+    return digest.hexdigest()
+
+
+def dataset_hash(path):
+    digest = hashlib.sha256()
+    _hash_file(digest, path)
+    return digest.hexdigest()
+
+
+def snapshot_key(dataset_path, rows=None):
+    """Cache key of the snapshot seeded from `dataset_path`, optionally resized to `rows` patients."""
+    digest = hashlib.sha256()
+    digest.update(migration_state_hash().encode('ascii'))
+    digest.update(dataset_hash(dataset_path).encode('ascii'))
+    digest.update(f'rows={rows}'.encode('ascii'))
+    return digest.hexdigest()[:32]
+
+
+def write_sized_dataset(dataset_path, rows, output_path):
+    """
+    Writes a copy of the processed CSV that seeds exactly `rows` patients: the rows seed_data would reject are
+    dropped, the rest are cycled as often as needed (or cut short) and Patient IDs are renumbered the way
+    clean_data.py numbers them, so they stay unique.
+    """
+    df = pd.read_csv(dataset_path, dtype=str, keep_default_na=False, encoding='utf-8')
+    # The IDs are replaced below, so only the other columns decide whether a row can be seeded
+    valid, _ = validate_seed_rows(df.assign(**{'Patient ID': [f'row{i}' for i in range(len(df))]}))
+    if valid.empty:
+        raise ValueError(f'{dataset_path} has no rows that seed_data accepts to build a dataset from.')
+
+    width = max(4, len(str(rows)))
+    sized = valid.iloc[[i % len(valid) for i in range(rows)]]
+    sized = sized.assign(**{'Patient ID': [f'P{i+1:0{width}d}' for i in range(rows)]})
+    sized.to_csv(output_path, index=False, encoding='utf-8')
+
+
+def _manage(args, db_path, log):
+    # Runs manage.py in a child process against `db_path`, leaving this process's database connection alone
+    env = dict(os.environ, FEMTRACK_DB_PATH=str(db_path))
+    subprocess.run(
+        [sys.executable, str(Path(settings.BASE_DIR) / 'manage.py')] + args,
+        env=env, stdout=log, stderr=subprocess.STDOUT, check=True
+    )
+
+
+def build_snapshot(dataset_path, rows, snapshot_path, log_path):
+    """
+    Migrates a fresh SQLite file, seeds it from the dataset and moves it to `snapshot_path` once complete.
+    Output of both commands goes to `log_path`. Raises RuntimeError if seeding did not finish.
+    """
+    snapshot_path.parent.mkdir(parents=True, exist_ok=True)
+    with tempfile.TemporaryDirectory(dir=snapshot_path.parent) as work_dir:
+        db_path = Path(work_dir) / 'snapshot.sqlite3'
+        seed_csv = dataset_path
+        if rows is not None:
+            seed_csv = Path(work_dir) / 'dataset.csv'
+            write_sized_dataset(dataset_path, rows, seed_csv)
+
+        with open(log_path, 'w', encoding='utf-8') as log:
+            _manage(['migrate', '--noinput'], db_path, log)
+            log.flush()
+            _manage(['seed_data', str(seed_csv), '--reuse-password-hash'], db_path, log)
+        with open(log_path, encoding='utf-8') as log:
+            # seed_data reports errors instead of exiting non-zero; its final line only appears on success
+            if 'Successfully seeded database!' not in log.read():
+                raise RuntimeError(f'seed_data did not finish, see {log_path}')
+
+        # Compact the file so every later copy is as small as possible
+        connection = sqlite3.connect(db_path)
+        try:
+            connection.execute('VACUUM')
+        finally:
+            connection.close()
+        os.replace(db_path, snapshot_path) # Atomic: concurrent runs never see a half-built snapshot
+
+
+def install_snapshot(snapshot_path, target_path):
+    """
+    Copies a snapshot to `target_path` through a temporary file and an atomic rename, so a reader never opens a
+    partial copy. The cost is one sequential file copy, independent of how long the snapshot took to build.
+    """
+    target_path = Path(target_path)
+    target_path.parent.mkdir(parents=True, exist_ok=True)
+    temp_path = target_path.with_name(f'.{target_path.name}.tmp')
+    shutil.copyfile(snapshot_path, temp_path)
+    os.replace(temp_path, target_path)
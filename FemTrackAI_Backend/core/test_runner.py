@@ -0,0 +1,53 @@
+# core/test_runner.py
+import os
+import shutil
+import tempfile
+from pathlib import Path
+
+from django.db import connections
+from django.test.runner import DiscoverRunner
+
+from .snapshots import install_snapshot
+
+# Tag of the tests that need the seeded data of a snapshot
+SEEDED_TAG = 'seeded'
+
+
+class SnapshotTestRunner(DiscoverRunner):
+    """
+    Test runner that can start from a seeded snapshot (manage.py seed_snapshot) instead of an empty database.
+
+    With FEMTRACK_TEST_SNAPSHOT set to a snapshot file, every run copies it to a fresh temporary file and runs the
+    tests tagged 'seeded' against the copy (or the tests selected with --tag), so the snapshot itself is never
+    written to and each run starts from the same data. Without it, the 'seeded' tests are left out and the rest
+    of the suite runs on the usual empty in-memory database.
+    """
+
+    def __init__(self, tags=None, exclude_tags=None, **kwargs):
+        self.snapshot_path = os.environ.get('FEMTRACK_TEST_SNAPSHOT') or None
+        if self.snapshot_path:
+            tags = tags or [SEEDED_TAG]
+        else:
+            exclude_tags = list(exclude_tags or []) + [SEEDED_TAG]
+        super().__init__(tags=tags, exclude_tags=exclude_tags, **kwargs)
+        if self.snapshot_path:
+            self.parallel = 1 # Workers would each need their own copy of the snapshot
+        self._snapshot_dir = None
+
+    def setup_databases(self, **kwargs):
+        if self.snapshot_path:
+            if not os.path.isfile(self.snapshot_path):
+                raise FileNotFoundError(f'FEMTRACK_TEST_SNAPSHOT: no snapshot at {self.snapshot_path}')
+            self._snapshot_dir = tempfile.mkdtemp(prefix='femtrack-test-')
+            test_db_path = Path(self._snapshot_dir) / 'test.sqlite3'
+            install_snapshot(self.snapshot_path, test_db_path)
+            connections['default'].settings_dict['TEST']['NAME'] = str(test_db_path)
+            # Keep the copy as it is (only migrations newer than the snapshot are applied); it is removed below
+            self.keepdb = True
+        return super().setup_databases(**kwargs)
+
+    def teardown_databases(self, old_config, **kwargs):
+        super().teardown_databases(old_config, **kwargs)
+        if self._snapshot_dir:
+            shutil.rmtree(self._snapshot_dir, ignore_errors=True)
+            self._snapshot_dir = None
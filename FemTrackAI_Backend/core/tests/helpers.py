@@ -0,0 +1,49 @@
+# core/tests/helpers.py
+# Builders shared by the test modules
+from ..lookups import lookup_cache
+from ..models import User, PatientProfile, DoctorProfile, ScreeningRecord, Region, ScreeningType, RecommendedAction
+
+
+def clear_lookup_caches():
+    # The caches are process-wide and outlive the rows of a finished test
+    for model in (Region, ScreeningType, RecommendedAction):
+        lookup_cache(model).clear()
+
+
+def seed_row(patient_id, **values):
+    """One row of the processed CSV, valid unless `values` says otherwise."""
+    row = {
+        'Patient ID': patient_id, 'Age': '30', 'Sexual Partners': '2', 'First Sexual Activity Age': '18',
+        'Risk Level': 'Low Risk', 'HPV Test Result': 'NEGATIVE', 'Pap Smear Result': 'N', 'Smoking Status': 'N',
+        'STDs History': 'N', 'Region': 'Pumwani', 'Insrance Covered': 'Y',
+        'Recommended Action': 'REPEAT PAP SMEAR IN 3 YEARS', 'Screening Type Last': 'PAP SMEAR',
+    }
+    row.update(values)
+    return row
+
+
+def make_doctor(username):
+    # Users get no password (tests use force_authenticate), which skips the slow password hashing
+    user = User.objects.create_user(username, f'{username}@example.com', None, user_type='doctor')
+    return DoctorProfile.objects.create(user=user)
+
+
+def make_patient(username, risk_level='Unknown', **user_fields):
+    user = User.objects.create_user(
+        username, f'{username}@example.com', None, user_type='patient', **user_fields
+    )
+    return PatientProfile.objects.create(
+        user=user, age=30, sexual_partners=1, first_sexual_activity_age=18, risk_level=risk_level
+    )
+
+
+def make_screening(patient, screening_date=None, doctor=None, region=None):
+    screening = ScreeningRecord.objects.create(
+        patient=patient, doctor=doctor, screening_type=ScreeningType.objects.get_or_create(name='PAP SMEAR')[0],
+        region=Region.objects.get_or_create(name=region)[0] if region else None,
+        pap_smear_result='N', smoking_status='N', stds_history='N', insurance_covered='Y'
+    )
+    if screening_date is not None:
+        # screening_date is auto_now_add, so backdate it afterwards
+        ScreeningRecord.objects.filter(pk=screening.pk).update(screening_date=screening_date)
+    return screening
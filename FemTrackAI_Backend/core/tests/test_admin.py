@@ -0,0 +1,55 @@
+# core/tests/test_admin.py
+from django.test import TestCase
+
+from ..admin import LookaheadPaginator
+from ..models import User, ScreeningRecord
+from .helpers import clear_lookup_caches, make_patient, make_screening
+
+
+class LookaheadPaginatorTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        patients = [make_patient(f'p{i:04d}') for i in range(3)]
+        for i in range(95):
+            make_screening(patients[i % 3])
+
+    def paginator(self, page_number, per_page=10):
+        return LookaheadPaginator(ScreeningRecord.objects.order_by('id'), per_page, page_number=page_number)
+
+    def test_count_stops_a_few_pages_ahead(self):
+        paginator = self.paginator(1)
+        self.assertEqual(paginator.count, (1 + LookaheadPaginator.pages_ahead) * 10)
+        self.assertTrue(paginator.is_capped)
+        # Every page it reports exists and is full
+        self.assertEqual(len(paginator.page(paginator.num_pages).object_list), 10)
+
+    def test_count_is_exact_near_the_end(self):
+        paginator = self.paginator(6)
+        self.assertEqual(paginator.count, 95)
+        self.assertFalse(paginator.is_capped)
+        self.assertEqual(len(paginator.page(paginator.num_pages).object_list), 5)
+
+    def test_count_respects_filters(self):
+        queryset = ScreeningRecord.objects.filter(patient__user__username='p0000').order_by('id')
+        paginator = LookaheadPaginator(queryset, 10, page_number=1)
+        self.assertEqual((paginator.count, paginator.is_capped), (32, False))
+
+
+class LargeChangelistTests(TestCase):
+    def setUp(self):
+        clear_lookup_caches()
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@example.com', None))
+
+    def test_changelist_shows_a_capped_count(self):
+        patients = [make_patient(f'p{i:04d}') for i in range(2)]
+        for i in range(320):
+            make_screening(patients[i % 2])
+        response = self.client.get('/admin/core/screeningrecord/')
+        self.assertContains(response, '300+ screening records')
+        self.assertContains(self.client.get('/admin/core/screeningrecord/', {'p': 6}), '320 screening records')
+
+    def test_small_changelists_show_the_exact_count(self):
+        make_patient('p0001')
+        response = self.client.get('/admin/core/patientprofile/')
+        self.assertContains(response, '1 patient profile')
+        self.assertNotContains(response, '1+')
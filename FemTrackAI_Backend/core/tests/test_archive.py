@@ -0,0 +1,86 @@
+# core/tests/test_archive.py
+from datetime import date, timedelta
+from io import StringIO
+
+from django.core.management import call_command, CommandError
+from django.test import TestCase
+
+from ..archive import archive_batch
+from ..models import PatientProfile, ScreeningRecord, ArchivedScreeningRecord
+from .helpers import clear_lookup_caches, make_patient, make_screening, seed_row
+from .test_seed_data import SeedCommandTestCase
+
+
+class ArchiveBatchTests(TestCase):
+    def setUp(self):
+        clear_lookup_caches()
+        self.cutoff = date.today() - timedelta(days=730)
+        self.old = date.today() - timedelta(days=1000)
+
+    def test_each_patients_latest_screening_stays_live(self):
+        patient = make_patient('p0001')
+        oldest = make_screening(patient, self.old - timedelta(days=10))
+        older = make_screening(patient, self.old)
+        latest = make_screening(patient, self.old) # Same date as `older`: the higher id is the latest
+        only = make_screening(make_patient('p0002'), self.old)
+
+        self.assertEqual(archive_batch(self.cutoff, 100), 2)
+        self.assertEqual(set(ScreeningRecord.objects.values_list('id', flat=True)), {latest.pk, only.pk})
+        self.assertEqual(set(ArchivedScreeningRecord.objects.values_list('id', flat=True)), {oldest.pk, older.pk})
+        self.assertEqual(patient.screenings.first().pk, latest.pk)
+        self.assertEqual(archive_batch(self.cutoff, 100), 0)
+
+    def test_recent_screenings_and_batch_size_are_respected(self):
+        patient = make_patient('p0001')
+        old_ones = [make_screening(patient, self.old) for _ in range(3)]
+        recent = make_screening(patient) # Newer than the cutoff: stays live, but makes the old ones archivable
+
+        self.assertEqual(archive_batch(self.cutoff, 2), 2)
+        self.assertEqual(archive_batch(self.cutoff, 2), 1)
+        self.assertEqual(list(ScreeningRecord.objects.values_list('id', flat=True)), [recent.pk])
+        archived = ArchivedScreeningRecord.objects.get(pk=old_ones[0].pk)
+        self.assertEqual((archived.patient_id, archived.screening_date), (patient.pk, self.old))
+
+
+class ArchiveCommandTests(TestCase):
+    def setUp(self):
+        clear_lookup_caches()
+        patient = make_patient('p0001')
+        for _ in range(3):
+            make_screening(patient, date.today() - timedelta(days=1000))
+        make_screening(patient)
+
+    def archive(self, *args):
+        out = StringIO()
+        call_command('archive_screenings', *args, stdout=out)
+        return out.getvalue()
+
+    def test_dry_run_only_counts(self):
+        self.assertIn('Dry run: 3 screening(s) would be archived.', self.archive('--dry-run'))
+        self.assertEqual(ArchivedScreeningRecord.objects.count(), 0)
+
+    def test_archives_in_batches_until_done(self):
+        output = self.archive('--batch-size', '2')
+        self.assertIn('Archived 2 screening(s)...', output)
+        self.assertIn('Successfully archived 3 screening(s).', output)
+        self.assertEqual((ScreeningRecord.objects.count(), ArchivedScreeningRecord.objects.count()), (1, 3))
+
+    def test_rejects_bad_arguments(self):
+        for args in (('--days', '-1'), ('--batch-size', '0')):
+            with self.assertRaises(CommandError):
+                self.archive(*args)
+
+
+class SeedArchivedScreeningTests(SeedCommandTestCase):
+    def test_archived_seeded_screenings_are_not_duplicated(self):
+        self.seed([seed_row('P0001')])
+        make_screening(PatientProfile.objects.get(user__username='p0001')) # A newer one, so the seeded one archives
+        ScreeningRecord.objects.filter(source_fingerprint__isnull=False).update(
+            screening_date=date.today() - timedelta(days=1000)
+        )
+        self.assertEqual(archive_batch(date.today() - timedelta(days=730), 100), 1)
+
+        self.assertIn('unchanged: 1', self.seed([seed_row('P0001')]))
+        self.assertIn('updated: 1', self.seed([seed_row('P0001', Region='Kakamega')]))
+        self.assertEqual(ArchivedScreeningRecord.objects.get().region.name, 'Kakamega')
+        self.assertEqual(ScreeningRecord.objects.count(), 1)
@@ -0,0 +1,123 @@
+# core/tests/test_clean_data.py
+# clean_data.py lives next to manage.py and is imported as a top-level module
+import os
+import shutil
+import tempfile
+from contextlib import redirect_stdout
+from io import StringIO
+
+import pandas as pd
+from django.conf import settings
+from django.test import SimpleTestCase
+
+import clean_data
+
+BUNDLED_CSV = os.path.join(settings.BASE_DIR, '..', 'Cervical Cancer Datasets_.xlsx - Cervical Cancer Risk Factors.csv')
+BUNDLED_XLSX = os.path.join(settings.BASE_DIR, '..', 'Cervical Cancer Datasets_.xlsx - Cervical Cancer Risk Factors.xlsx')
+
+
+class PatientIdTests(SimpleTestCase):
+    def test_prefix_comes_from_the_whole_file_name(self):
+        self.assertEqual(clean_data.patient_id_prefix('exports/Kakamega County.csv'), 'P-KAKAMEGA-COUNTY-')
+        self.assertEqual(
+            clean_data.patient_id_prefix('a/Nairobi County Export 2026-01.xlsx'), 'P-NAIROBI-COUNTY-EXPORT-2026-01-'
+        )
+        self.assertNotEqual(
+            clean_data.patient_id_prefix('Nairobi County Export 2026-01.xlsx'),
+            clean_data.patient_id_prefix('Nairobi County Export 2026-02.csv'),
+        )
+
+    def test_overlong_names_are_shortened_with_a_hash(self):
+        first = clean_data.patient_id_prefix('A' * 200 + '1.csv')
+        second = clean_data.patient_id_prefix('A' * 200 + '2.csv')
+        self.assertNotEqual(first, second)
+        self.assertLessEqual(len(first), len('P-') + clean_data.MAX_PREFIX_SLUG + 1)
+
+    def test_ids_keep_their_width_when_the_file_grows(self):
+        df = clean_data.load_dataset(BUNDLED_CSV)
+        grown = pd.concat([df] * 101, ignore_index=True) # 10,100 rows
+        with redirect_stdout(StringIO()):
+            small = clean_data.finalize_dataframe(df.copy())
+            large = clean_data.finalize_dataframe(grown)
+        self.assertEqual(small['Patient ID'].iloc[0], 'P0001')
+        self.assertEqual(list(large['Patient ID'].iloc[:len(df)]), list(small['Patient ID']))
+        self.assertEqual(large['Patient ID'].iloc[-1], 'P10100')
+
+
+class CleanManyTests(SimpleTestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.dir)
+        self.output = os.path.join(self.dir, 'out.csv')
+
+    def export(self, name):
+        path = os.path.join(self.dir, name)
+        shutil.copyfile(BUNDLED_CSV, path)
+        return path
+
+    def clean(self, paths, **kwargs):
+        with redirect_stdout(StringIO()) as out:
+            ok = clean_data.clean_many(paths, self.output, workers=2, **kwargs)
+        return ok, out.getvalue()
+
+    def test_files_are_merged_with_per_file_ids(self):
+        kakamega, pumwani = self.export('Kakamega.csv'), self.export('Pumwani.csv')
+        ok, _ = self.clean([kakamega, pumwani])
+        self.assertTrue(ok)
+        ids = pd.read_csv(self.output)['Patient ID']
+        self.assertEqual(len(ids), 200)
+        self.assertTrue(ids.is_unique)
+        self.assertEqual((ids.iloc[0], ids.iloc[100]), ('P-KAKAMEGA-0001', 'P-PUMWANI-0001'))
+
+        # A file's IDs don't depend on the other files of the run
+        self.clean([pumwani])
+        self.assertEqual(list(pd.read_csv(self.output)['Patient ID']), list(ids.iloc[100:]))
+
+    def test_file_names_with_the_same_prefix_are_refused(self):
+        ok, out = self.clean([self.export('Kakamega County.csv'), self.export('Kakamega_County.csv')])
+        self.assertFalse(ok)
+        self.assertIn("same Patient ID prefix 'P-KAKAMEGA-COUNTY-'", out)
+        self.assertFalse(os.path.exists(self.output))
+
+    def test_explicit_prefix_needs_a_single_file(self):
+        ok, _ = self.clean([self.export('Kakamega.csv')], id_prefix='P')
+        self.assertTrue(ok)
+        self.assertEqual(pd.read_csv(self.output)['Patient ID'].iloc[0], 'P0001')
+        ok, _ = self.clean([self.export('Kakamega.csv'), self.export('Pumwani.csv')], id_prefix='P')
+        self.assertFalse(ok)
+
+
+class StreamingInputTests(SimpleTestCase):
+    def write_workbook(self, rows):
+        from openpyxl import Workbook
+
+        handle, path = tempfile.mkstemp(suffix='.xlsx')
+        os.close(handle)
+        self.addCleanup(os.remove, path)
+        workbook = Workbook()
+        sheet = workbook.active
+        for row in rows:
+            sheet.append(row)
+        workbook.save(path)
+        return path
+
+    def test_xlsx_rows_are_streamed_in_batches(self):
+        path = self.write_workbook(
+            [['Age', None, 'Region']] + [[20 + i, 'x', f'R{i}'] for i in range(5)] + [[None, None, None]]
+        )
+        batches = list(clean_data.iter_xlsx_batches(path, batch_size=2))
+        self.assertEqual([len(batch) for batch in batches], [2, 2, 1]) # The empty trailing row is skipped
+        self.assertEqual(list(batches[0].columns), ['Age', 'Region']) # So is the unnamed column
+        self.assertEqual(list(pd.concat(batches)['Region']), ['R0', 'R1', 'R2', 'R3', 'R4'])
+
+    def test_csv_and_xlsx_inputs_clean_the_same(self):
+        from_csv = clean_data.load_dataset(BUNDLED_CSV, batch_size=7)
+        from_xlsx = clean_data.load_dataset(BUNDLED_XLSX, batch_size=7)
+        pd.testing.assert_frame_equal(
+            from_csv.reset_index(drop=True), from_xlsx.reset_index(drop=True), check_dtype=False
+        )
+
+    def test_batch_size_does_not_change_the_result(self):
+        whole = clean_data.load_dataset(BUNDLED_CSV)
+        batched = clean_data.load_dataset(BUNDLED_CSV, batch_size=3)
+        pd.testing.assert_frame_equal(whole.reset_index(drop=True), batched.reset_index(drop=True))
@@ -0,0 +1,198 @@
+# core/tests/test_events.py
+import asyncio
+import time
+from unittest import mock
+
+from django.core import signing
+from django.test import SimpleTestCase, TestCase
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from .. import views
+from ..events import BroadcastHub, doctor_topic, hub
+from ..models import PatientAssignment, User
+from .helpers import clear_lookup_caches, make_doctor, make_patient
+
+SCREENING = {
+    'screening_type': 'HPV DNA', 'hpv_test_result': 'POSITIVE',
+    'pap_smear_result': 'N', 'smoking_status': 'N', 'stds_history': 'N', 'insurance_covered': 'Y',
+}
+
+
+def drain(queue):
+    events = []
+    while not queue.empty():
+        events.append(queue.get_nowait())
+    return events
+
+
+class BroadcastHubTests(SimpleTestCase):
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        self.addCleanup(self.loop.close)
+        self.hub = BroadcastHub(queue_size=3)
+
+    def subscribe(self, topic):
+        async def subscribe():
+            return self.hub.subscribe(topic)
+        return self.loop.run_until_complete(subscribe())
+
+    def deliver(self):
+        # Runs the callbacks publish() handed to the loop
+        self.loop.run_until_complete(asyncio.sleep(0))
+
+    def test_events_reach_only_the_topic_subscribers(self):
+        _, queue = self.subscribe('doctor:1')
+        _, other_queue = self.subscribe('doctor:2')
+        self.hub.publish('doctor:1', {'type': 'patient', 'data': {'n': 1}})
+        self.hub.publish('doctor:3', {'type': 'patient', 'data': {'n': 2}})
+        self.deliver()
+        self.assertEqual(drain(queue), [{'type': 'patient', 'data': {'n': 1}}])
+        self.assertEqual(drain(other_queue), [])
+        self.assertEqual(self.hub.subscribed_topics(['doctor:1', 'doctor:3']), ['doctor:1'])
+
+    def test_slow_subscribers_are_told_to_resync(self):
+        _, queue = self.subscribe('doctor:1')
+        for n in range(5):
+            self.hub.publish('doctor:1', {'type': 'patient', 'data': {'n': n}})
+        self.deliver()
+        # The fourth event found the queue full: the backlog was dropped for a resync, and the fifth followed it
+        self.assertEqual(drain(queue), [{'type': 'resync'}, {'type': 'patient', 'data': {'n': 4}}])
+
+    def test_unsubscribing_forgets_empty_topics(self):
+        subscriber = self.subscribe('doctor:1')
+        self.assertTrue(self.hub.has_subscribers())
+        self.hub.unsubscribe('doctor:1', subscriber)
+        self.assertFalse(self.hub.has_subscribers())
+        self.hub.unsubscribe('doctor:1', subscriber) # Already gone: no error
+
+    def test_publishing_to_a_closed_loop_is_ignored(self):
+        self.subscribe('doctor:1')
+        self.loop.close()
+        self.hub.publish('doctor:1', {'type': 'patient'})
+
+
+class PublishPatientUpdateTests(TestCase):
+    def setUp(self):
+        clear_lookup_caches()
+        self.doctor = make_doctor('doc_a')
+        self.patient = make_patient('p_one', risk_level='Low Risk')
+        self.loop = asyncio.new_event_loop()
+        self.addCleanup(self.loop.close)
+
+        async def subscribe():
+            return hub.subscribe(doctor_topic(self.doctor.pk))
+        subscriber = self.loop.run_until_complete(subscribe())
+        self.addCleanup(hub.unsubscribe, doctor_topic(self.doctor.pk), subscriber)
+        self.queue = subscriber[1]
+
+    def published(self):
+        self.loop.run_until_complete(asyncio.sleep(0))
+        return drain(self.queue)
+
+    def test_assigning_a_patient_adds_them_to_the_dashboard(self):
+        admin_client = APIClient()
+        admin_client.force_login(User.objects.create_superuser('admin', 'admin@example.com', None))
+        with self.captureOnCommitCallbacks(execute=True):
+            admin_client.post(
+                '/admin/core/patientassignment/add/', {'doctor': self.doctor.pk, 'patient': self.patient.pk}
+            )
+        [event] = self.published()
+        self.assertEqual(event['data']['counts'], {'total_patients': 1, 'low_risk': 1})
+        self.assertEqual(event['data']['patient']['user'], self.patient.pk)
+
+    def test_assessments_move_the_patient_between_counters(self):
+        PatientAssignment.objects.create(doctor=self.doctor, patient=self.patient)
+        client = APIClient()
+        client.force_authenticate(self.doctor.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = client.post('/api/screenings/', dict(SCREENING, patient=self.patient.pk), format='json')
+        self.assertEqual(response.status_code, 201)
+        [event] = self.published()
+        self.assertEqual(event['data']['counts'], {'low_risk': -1, 'pending_assessment': 1})
+
+    def test_nothing_is_published_for_patients_off_the_panel(self):
+        other = make_doctor('doc_b')
+        PatientAssignment.objects.create(doctor=other, patient=self.patient)
+        client = APIClient()
+        client.force_authenticate(other.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            client.post('/api/screenings/', dict(SCREENING, patient=self.patient.pk), format='json')
+        self.assertEqual(self.published(), [])
+
+
+class DashboardEventsAuthTests(TestCase):
+    def setUp(self):
+        self.doctor = make_doctor('doc_a')
+        self.patient = make_patient('p_one')
+
+    def stream_token(self, user, age=0):
+        with mock.patch('django.core.signing.time.time', return_value=time.time() - age):
+            return views._stream_signer().sign(str(user.pk))
+
+    def test_doctors_get_a_stream_token(self):
+        client = APIClient()
+        client.force_authenticate(self.doctor.user)
+        response = client.post('/api/events/dashboard/token/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(views._stream_signer().unsign(response.data['token']), str(self.doctor.user.pk))
+        self.assertEqual(response.data['expires_in'], views.EVENT_STREAM_TOKEN_MAX_AGE)
+
+    def test_stream_tokens_are_for_doctors_only(self):
+        client = APIClient()
+        self.assertEqual(client.post('/api/events/dashboard/token/').status_code, 401)
+        client.force_authenticate(self.patient.user)
+        self.assertEqual(client.post('/api/events/dashboard/token/').status_code, 403)
+
+    def test_stream_tokens_only_open_event_streams(self):
+        # Signed with their own salt, so they can't pass for any other signed value
+        token = self.stream_token(self.doctor.user)
+        with self.assertRaises(signing.BadSignature):
+            signing.TimestampSigner().unsign(token)
+
+    def test_streams_need_the_asgi_server(self):
+        self.assertEqual(self.client.get('/api/events/dashboard/').status_code, 501)
+
+    async def test_stream_rejects_bad_credentials(self):
+        expired = self.stream_token(self.doctor.user, age=views.EVENT_STREAM_TOKEN_MAX_AGE + 5)
+        for params, headers in (
+            ({}, {}),
+            ({'token': 'not-a-token'}, {}),
+            ({'token': expired}, {}),
+            ({}, {'Authorization': 'Token not-a-key'}),
+        ):
+            response = await self.async_client.get('/api/events/dashboard/', params, headers=headers)
+            self.assertEqual(response.status_code, 401, (params, headers))
+
+    async def test_stream_is_for_doctors_only(self):
+        token = self.stream_token(self.patient.user)
+        response = await self.async_client.get('/api/events/dashboard/', {'token': token})
+        self.assertEqual(response.status_code, 403)
+
+    async def test_stream_opens_with_a_stream_token_or_api_token(self):
+        token = self.stream_token(self.doctor.user)
+        api_token = await Token.objects.acreate(user=self.doctor.user)
+        for params, headers in (({'token': token}, {}), ({}, {'Authorization': f'Token {api_token.key}'})):
+            response = await self.async_client.get('/api/events/dashboard/', params, headers=headers)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response['Content-Type'], 'text/event-stream')
+            chunks = await self.read_until_cancelled(response, 2)
+            self.assertEqual(chunks, [b'retry: 5000\n\n', b'event: ready\ndata: {}\n\n'])
+        self.assertFalse(hub.has_subscribers())
+
+    async def read_until_cancelled(self, response, count):
+        # Reads `count` chunks, then cancels the stream as the server does when the client disconnects
+        chunks = []
+        received = asyncio.Event()
+
+        async def read():
+            async for chunk in response.streaming_content:
+                chunks.append(chunk)
+                if len(chunks) == count:
+                    received.set()
+        task = asyncio.create_task(read())
+        await asyncio.wait_for(received.wait(), timeout=5)
+        task.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await task
+        return chunks
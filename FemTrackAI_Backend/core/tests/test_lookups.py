@@ -0,0 +1,169 @@
+# core/tests/test_lookups.py
+from django.db import connection, transaction
+from django.db.migrations.executor import MigrationExecutor
+from django.test import TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from ..lookups import lookup_cache
+from ..models import User, PatientAssignment, Region, ScreeningType, HpvResult, RiskLevel
+from .helpers import clear_lookup_caches, make_doctor, make_patient
+
+
+class LookupCacheTests(TestCase):
+    def setUp(self):
+        clear_lookup_caches()
+        self.addCleanup(clear_lookup_caches)
+
+    def test_existing_rows_are_cached_inside_a_transaction(self):
+        pumwani = Region.objects.create(name='Pumwani')
+        cache = lookup_cache(Region)
+        with transaction.atomic(), CaptureQueriesContext(connection) as queries:
+            ids = [cache.id_for(' Pumwani ') for _ in range(5)]
+            self.assertEqual(cache.name(pumwani.pk), 'Pumwani')
+        self.assertEqual(ids, [pumwani.pk] * 5)
+        self.assertEqual(len(queries), 1) # The warm-up load
+
+    def test_rows_created_in_a_rolled_back_transaction_are_not_cached(self):
+        cache = lookup_cache(Region)
+        with self.assertRaises(RuntimeError), transaction.atomic():
+            cache.id_for('Kakamega')
+            raise RuntimeError
+        self.assertIsNone(cache.id_for('Kakamega', create=False))
+
+
+class ScreeningLookupMigrationTests(TransactionTestCase):
+    """Migration 0006: text columns to lookup tables and integer codes, and back."""
+    before = [('core', '0005_patient_assignment')]
+    after = [('core', '0006_screening_lookup_tables')]
+
+    def setUp(self):
+        clear_lookup_caches()
+        self.executor = MigrationExecutor(connection)
+        self.executor.migrate(self.before)
+        self.executor.loader.build_graph()
+
+    def tearDown(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(executor.loader.graph.leaf_nodes())
+        clear_lookup_caches()
+
+    def _migrate(self, targets):
+        self.executor.loader.build_graph()
+        self.executor.migrate(targets)
+        self.executor.loader.build_graph()
+        return self.executor.loader.project_state(targets).apps
+
+    def _legacy_screening(self, apps, **values):
+        User = apps.get_model('core', 'User')
+        PatientProfile = apps.get_model('core', 'PatientProfile')
+        ScreeningRecord = apps.get_model('core', 'ScreeningRecord')
+        user, _ = User.objects.get_or_create(username='p0001', defaults={'email': 'p0001@example.com'})
+        patient, _ = PatientProfile.objects.get_or_create(
+            user=user, defaults={'age': 30, 'sexual_partners': 1, 'first_sexual_activity_age': 18}
+        )
+        fields = {
+            'screening_type': 'PAP SMEAR', 'hpv_test_result': 'NEGATIVE', 'pap_smear_result': 'N',
+            'smoking_status': 'N', 'stds_history': 'N', 'insurance_covered': 'Y', 'region': 'Pumwani',
+            'recommended_action': 'Follow up', 'assessment_risk_level': 'Low Risk',
+        }
+        fields.update(values)
+        return ScreeningRecord.objects.create(patient=patient, **fields).pk
+
+    def test_converts_to_lookups_and_back(self):
+        old_apps = self.executor.loader.project_state(self.before).apps
+        plain = self._legacy_screening(old_apps, region=' Pumwani ', hpv_test_result='positive',
+                                       assessment_risk_level='HIGH RISK')
+        blank = self._legacy_screening(old_apps, screening_type='  ', region='Pumwani', hpv_test_result='',
+                                       recommended_action='', assessment_risk_level='')
+
+        new_apps = self._migrate(self.after)
+        ScreeningRecord = new_apps.get_model('core', 'ScreeningRecord')
+        converted = ScreeningRecord.objects.select_related('screening_type', 'region', 'recommended_action')
+        row = converted.get(pk=plain)
+        self.assertEqual(
+            (row.screening_type.name, row.region.name, row.recommended_action.name),
+            ('PAP SMEAR', 'Pumwani', 'Follow up')
+        )
+        self.assertEqual((row.hpv_test_result, row.assessment_risk_level), (HpvResult.POSITIVE, RiskLevel.HIGH))
+        row = converted.get(pk=blank)
+        self.assertEqual(row.screening_type.name, 'UNSPECIFIED')
+        self.assertIsNone(row.recommended_action)
+        self.assertEqual((row.hpv_test_result, row.assessment_risk_level), (None, RiskLevel.UNKNOWN))
+        # Both spellings of the region share one lookup row
+        self.assertEqual(new_apps.get_model('core', 'Region').objects.count(), 1)
+
+        old_apps = self._migrate(self.before)
+        ScreeningRecord = old_apps.get_model('core', 'ScreeningRecord')
+        self.assertEqual(
+            list(ScreeningRecord.objects.order_by('pk').values_list(
+                'screening_type', 'region', 'recommended_action', 'hpv_test_result', 'assessment_risk_level'
+            )),
+            [('PAP SMEAR', 'Pumwani', 'Follow up', 'POSITIVE', 'High Risk'),
+             ('UNSPECIFIED', 'Pumwani', None, None, 'Unknown')]
+        )
+
+    def test_refuses_values_it_cannot_keep(self):
+        old_apps = self.executor.loader.project_state(self.before).apps
+        self._legacy_screening(old_apps, recommended_action='A' * 300)
+        self._legacy_screening(old_apps, hpv_test_result='PENDING')
+
+        with self.assertRaisesMessage(ValueError, 'without losing data') as raised:
+            self._migrate(self.after)
+        self.assertIn('300 characters', str(raised.exception))
+        self.assertIn("'PENDING'", str(raised.exception))
+        # Nothing was converted: the data is still on the old schema, as it was
+        ScreeningRecord = self.executor.loader.project_state(self.before).apps.get_model('core', 'ScreeningRecord')
+        self.assertEqual(
+            sorted(ScreeningRecord.objects.values_list('recommended_action', flat=True)), ['A' * 300, 'Follow up']
+        )
+        ScreeningRecord.objects.all().delete() # Let tearDown migrate forward again
+
+
+class LookupNameFieldTests(TestCase):
+    def setUp(self):
+        clear_lookup_caches()
+        self.doctor = make_doctor('doc_a')
+        self.patient = make_patient('p0001')
+        PatientAssignment.objects.create(doctor=self.doctor, patient=self.patient)
+        self.client = APIClient()
+        self.client.force_authenticate(self.doctor.user)
+
+    def post_screening(self, **values):
+        data = {
+            'patient': self.patient.pk, 'screening_type': 'PAP SMEAR',
+            'pap_smear_result': 'N', 'smoking_status': 'N', 'stds_history': 'N', 'insurance_covered': 'Y',
+        }
+        data.update(values)
+        return self.client.post('/api/screenings/', data, format='json')
+
+    def test_names_are_trimmed_and_blank_optional_names_are_null(self):
+        response = self.post_screening(screening_type=' HPV DNA ', region='  ')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual((response.data['screening_type'], response.data['region']), ('HPV DNA', None))
+
+    def test_blank_required_name_is_a_validation_error(self):
+        response = self.post_screening(screening_type='   ')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('screening_type', response.data)
+
+    def test_failed_validation_creates_no_lookup_rows(self):
+        response = self.post_screening(region='Junkville', hpv_test_result='MAYBE')
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Region.objects.filter(name='Junkville').exists())
+
+        self.assertEqual(self.post_screening(region='Junkville').status_code, 201)
+        self.assertTrue(Region.objects.filter(name='Junkville').exists())
+
+
+class LookupTableAdminTests(TestCase):
+    def setUp(self):
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@example.com', None))
+
+    def test_lookup_rows_can_be_added_but_not_changed_or_deleted(self):
+        region = Region.objects.create(name='Pumwani')
+        self.assertEqual(self.client.post(f'/admin/core/region/{region.pk}/change/', {'name': 'X'}).status_code, 403)
+        self.assertEqual(self.client.post(f'/admin/core/region/{region.pk}/delete/', {'post': 'yes'}).status_code, 403)
+        self.assertEqual(self.client.post('/admin/core/screeningtype/add/', {'name': 'VIA'}).status_code, 302)
+        self.assertEqual(Region.objects.get().name, 'Pumwani')
+        self.assertTrue(ScreeningType.objects.filter(name='VIA').exists())
@@ -0,0 +1,77 @@
+# core/tests/test_panels.py
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from ..models import User, PatientAssignment, ScreeningRecord
+from .helpers import clear_lookup_caches, make_doctor, make_patient, make_screening
+
+SCREENING = {
+    'screening_type': 'HPV DNA', 'hpv_test_result': 'POSITIVE',
+    'pap_smear_result': 'N', 'smoking_status': 'N', 'stds_history': 'N', 'insurance_covered': 'Y',
+}
+
+
+class DoctorPanelTests(TestCase):
+    def setUp(self):
+        clear_lookup_caches()
+        self.doctor = make_doctor('doc_a')
+        self.other_doctor = make_doctor('doc_b')
+        self.mine = make_patient('p_mine', risk_level='High Risk')
+        self.theirs = make_patient('p_theirs', risk_level='Low Risk')
+        PatientAssignment.objects.create(doctor=self.doctor, patient=self.mine)
+        PatientAssignment.objects.create(doctor=self.other_doctor, patient=self.theirs)
+        self.my_screening = make_screening(self.mine, doctor=self.doctor)
+        make_screening(self.theirs, doctor=self.other_doctor)
+        self.client = APIClient()
+        self.client.force_authenticate(self.doctor.user)
+
+    def test_dashboard_lists_only_the_doctors_panel(self):
+        response = self.client.get('/api/patients/for-doctor-dashboard/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([row['user'] for row in response.data], [self.mine.pk])
+
+    def test_summary_counts_cover_only_the_doctors_panel(self):
+        response = self.client.get('/api/patients/summary-counts/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['total_patients'], 1)
+        self.assertEqual((response.data['high_risk'], response.data['low_risk']), (1, 0))
+
+    def test_screenings_and_reports_of_other_panels_are_hidden(self):
+        response = self.client.get('/api/screenings/')
+        self.assertEqual([row['id'] for row in response.data], [self.my_screening.pk])
+        self.assertEqual(self.client.get(f'/api/patients/{self.theirs.pk}/risk-report/').status_code, 404)
+
+    def test_assessing_a_panel_patient_updates_their_risk(self):
+        response = self.client.post('/api/screenings/', dict(SCREENING, patient=self.mine.pk), format='json')
+        self.assertEqual(response.status_code, 201)
+        self.mine.refresh_from_db()
+        self.assertEqual(self.mine.risk_level, 'Unknown') # The new screening's (unassessed) risk level
+        self.assertEqual(response.data['doctor'], self.doctor.pk)
+
+    def test_patients_of_other_panels_cannot_be_assessed(self):
+        for url in ('/api/screenings/', '/api/screenings/new-assessment/'):
+            response = self.client.post(url, dict(SCREENING, patient=self.theirs.pk), format='json')
+            self.assertEqual(response.status_code, 400)
+            self.assertIn('patient', response.data)
+        # Neither a screening nor a panel assignment came of it, so access stays as it was
+        self.assertEqual(ScreeningRecord.objects.filter(patient=self.theirs).count(), 1)
+        self.assertFalse(PatientAssignment.objects.filter(doctor=self.doctor, patient=self.theirs).exists())
+        self.assertEqual(self.client.get(f'/api/patients/{self.theirs.pk}/risk-report/').status_code, 404)
+
+    def test_patients_only_record_their_own_screenings(self):
+        client = APIClient()
+        client.force_authenticate(self.mine.user)
+        self.assertEqual(client.post('/api/screenings/', dict(SCREENING, patient=self.theirs.pk), format='json').status_code, 400)
+        self.assertEqual(client.post('/api/screenings/', dict(SCREENING, patient=self.mine.pk), format='json').status_code, 201)
+        self.assertEqual([row['patient'] for row in client.get('/api/screenings/').data], [self.mine.pk] * 2)
+
+    def test_staff_assign_patients_in_the_admin(self):
+        admin_client = APIClient()
+        admin_client.force_login(User.objects.create_superuser('admin', 'admin@example.com', None))
+        response = admin_client.post(
+            '/admin/core/patientassignment/add/', {'doctor': self.doctor.pk, 'patient': self.theirs.pk}
+        )
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(self.client.get('/api/patients/summary-counts/').data['total_patients'], 2)
+        response = self.client.post('/api/screenings/', dict(SCREENING, patient=self.theirs.pk), format='json')
+        self.assertEqual(response.status_code, 201)
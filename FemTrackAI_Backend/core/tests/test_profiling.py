@@ -0,0 +1,105 @@
+# core/tests/test_profiling.py
+import json
+import os
+import pstats
+import tempfile
+
+from django.core.management import CommandError
+from django.test import SimpleTestCase
+
+from ..profiling import StageProfiler
+from .helpers import seed_row
+from .test_seed_data import SeedCommandTestCase
+
+
+class StageProfilerTests(SimpleTestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def test_disabled_profiler_measures_nothing(self):
+        profiler = StageProfiler('tool', enabled=False, cprofile_path=os.path.join(self.tmp.name, 'run.prof'))
+        profiler.start()
+        with profiler.stage('load') as stage:
+            stage.rows += 10
+        profiler.stop()
+        self.assertEqual(profiler.stages, {})
+        self.assertIsNone(profiler.cprofile_path)
+        self.assertIsNone(profiler.report()['started_at'])
+
+    def test_repeated_and_nested_stages_accumulate(self):
+        profiler = StageProfiler('tool')
+        profiler.start()
+        for _ in range(3):
+            with profiler.stage('batch') as batch:
+                batch.rows += 100
+                with profiler.stage('allocate'):
+                    data = bytearray(1 << 20)
+        del data
+        profiler.rows = 300
+        profiler.stop()
+
+        batch, allocate = profiler.stage_dicts()
+        self.assertEqual((batch['name'], batch['calls'], batch['rows']), ('batch', 3, 300))
+        self.assertEqual((allocate['name'], allocate['calls'], allocate['rows']), ('allocate', 3, 0))
+        self.assertIsNone(allocate['rows_per_sec'])
+        self.assertGreaterEqual(batch['seconds'], allocate['seconds']) # Nested times are inclusive
+        # The inner allocation counts towards both stages' peaks and the run's
+        self.assertGreaterEqual(allocate['peak_memory_bytes'], 1 << 20)
+        self.assertGreaterEqual(batch['peak_memory_bytes'], allocate['peak_memory_bytes'])
+        self.assertGreaterEqual(profiler.report()['total']['peak_memory_bytes'], batch['peak_memory_bytes'])
+
+    def test_merge_adds_up_worker_stages(self):
+        profiler = StageProfiler('tool')
+        profiler.start()
+        with profiler.stage('read') as stage:
+            stage.rows += 5
+        profiler.stop()
+        worker = {'name': 'read', 'calls': 2, 'seconds': 1.5, 'rows': 10, 'peak_memory_bytes': 1 << 40}
+        profiler.merge([worker, dict(worker, name='impute')])
+
+        read, impute = profiler.stage_dicts()
+        self.assertEqual((read['calls'], read['rows'], read['peak_memory_bytes']), (3, 15, 1 << 40))
+        self.assertGreaterEqual(read['seconds'], 1.5)
+        self.assertEqual((impute['calls'], impute['seconds'], impute['rows']), (2, 1.5, 10))
+        self.assertEqual(profiler.report()['total']['peak_memory_bytes'], 1 << 40)
+
+    def test_reports_are_written_as_json(self):
+        report_path = os.path.join(self.tmp.name, 'report.json')
+        dump_path = os.path.join(self.tmp.name, 'run.prof')
+        profiler = StageProfiler('tool', cprofile_path=dump_path)
+        profiler.start()
+        with profiler.stage('load') as stage:
+            stage.rows += 1
+        profiler.rows = 1
+        profiler.stop()
+        profiler.write_report(report_path, input='data.csv')
+
+        with open(report_path, encoding='utf-8') as f:
+            report = json.load(f)
+        self.assertEqual(report['context'], {'input': 'data.csv'})
+        self.assertEqual((report['tool'], report['cprofile_dump']), ('tool', dump_path))
+        self.assertEqual(report['total']['rows'], 1)
+        self.assertEqual([stage['name'] for stage in report['stages']], ['load'])
+        self.assertIsNotNone(report['started_at'])
+        pstats.Stats(dump_path) # A readable cProfile dump
+
+
+class SeedProfileTests(SeedCommandTestCase):
+    def test_seed_data_writes_a_profile_report(self):
+        report_path = os.path.join(tempfile.mkdtemp(), 'seed.json')
+        self.addCleanup(os.rmdir, os.path.dirname(report_path))
+        self.addCleanup(os.remove, report_path)
+        self.seed([seed_row('P0001'), seed_row('P0002')], '--profile', report_path)
+
+        with open(report_path, encoding='utf-8') as f:
+            report = json.load(f)
+        stages = {stage['name']: stage for stage in report['stages']}
+        self.assertEqual(report['tool'], 'seed_data')
+        self.assertEqual(report['total']['rows'], 2)
+        self.assertEqual(stages['read_csv']['rows'], 2)
+        self.assertIn('db_write', stages)
+
+    def test_cprofile_needs_a_report(self):
+        with self.assertRaises(CommandError):
+            self.seed([seed_row('P0001')], '--cprofile', 'run.prof')
@@ -0,0 +1,119 @@
+# core/tests/test_search.py
+import importlib
+from unittest import mock
+
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from .. import search
+from ..models import PatientProfile, PatientAssignment
+from ..search import search_patients
+from .helpers import clear_lookup_caches, make_doctor, make_patient, make_screening
+
+
+class SearchPatientsTests(TestCase):
+    def setUp(self):
+        clear_lookup_caches()
+        self.doctor = make_doctor('doc_a')
+        self.other_doctor = make_doctor('doc_b')
+        self.wanjiru = self.add(self.doctor, 'p-kakamega-0001', first_name='Wanjiru', last_name='Otieno', region='Kakamega')
+        self.achieng = self.add(self.doctor, 'p-pumwani-0002', first_name='Achieng', last_name='Mwangi', region='Pumwani')
+        self.kakamega_12 = self.add(self.doctor, 'p-kakamega-0012', region='Kakamega')
+        self.elsewhere = self.add(self.other_doctor, 'p-pumwani-0003', first_name='Achieng', region='Pumwani')
+        self.panel = PatientProfile.objects.filter(doctor_assignments__doctor_id=self.doctor.pk)
+        self.registry = PatientProfile.objects.all()
+
+    def add(self, doctor, username, region=None, **names):
+        patient = make_patient(username, **names)
+        PatientAssignment.objects.create(doctor=doctor, patient=patient)
+        make_screening(patient, doctor=doctor, region=region)
+        return patient
+
+    def search(self, queryset, query, limit=20):
+        return [patient.pk for patient in search_patients(queryset, query, limit=limit)]
+
+    def test_patient_id_prefix_matches_come_first(self):
+        # 'kakamega' is also the region of the third patient, but the ID prefix matches rank first
+        self.assertEqual(self.search(self.panel, 'P-KAKAMEGA-001'), [self.kakamega_12.pk])
+        self.assertEqual(self.search(self.panel, 'p-kakamega-00')[:2], [self.wanjiru.pk, self.kakamega_12.pk])
+
+    def test_substring_matches_any_field(self):
+        self.assertEqual(self.search(self.panel, 'otien'), [self.wanjiru.pk]) # Last name
+        self.assertEqual(self.search(self.panel, 'kamega-0001@example'), [self.wanjiru.pk])
+        self.assertEqual(set(self.search(self.panel, 'pumwani')), {self.achieng.pk}) # Region, via the triggers
+
+    def test_results_stay_within_the_scope(self):
+        self.assertEqual(set(self.search(self.registry, 'achieng')), {self.achieng.pk, self.elsewhere.pk})
+        self.assertEqual(self.search(self.panel, 'achieng'), [self.achieng.pk])
+        # The same, through the full-text match used for scopes too large to scan
+        with mock.patch.object(search, 'SCAN_SCOPE_LIMIT', 0):
+            self.assertEqual(self.search(self.panel, 'achieng'), [self.achieng.pk])
+
+    def test_typos_fall_back_to_fuzzy_matches(self):
+        self.assertEqual(self.search(self.panel, 'pumwanl'), [self.achieng.pk])
+        with mock.patch.object(search, 'SCAN_SCOPE_LIMIT', 0):
+            self.assertEqual(self.search(self.panel, 'pumwanl'), [self.achieng.pk])
+        self.assertEqual(set(self.search(self.registry, 'pumwanl')), {self.achieng.pk, self.elsewhere.pk})
+
+    def test_fuzzy_matches_are_skipped_when_something_contains_the_query(self):
+        # 'otieno' is contained in a name, so 'otieny'-like near misses elsewhere are not added
+        self.add(self.doctor, 'p-x-0004', last_name='Otienu')
+        self.assertEqual(self.search(self.panel, 'otieno'), [self.wanjiru.pk])
+
+    def test_limit_is_respected(self):
+        self.assertEqual(len(self.search(self.panel, 'example.com', limit=2)), 2)
+
+    def test_without_the_index_only_prefixes_match(self):
+        with mock.patch.object(search, 'has_search_index', return_value=False):
+            self.assertEqual(self.search(self.panel, 'wanj'), [self.wanjiru.pk])
+            self.assertEqual(self.search(self.panel, 'otien'), [self.wanjiru.pk])
+            self.assertEqual(self.search(self.panel, 'pumwani'), []) # No region or substring matching
+
+    def test_search_endpoint_runs_a_fixed_number_of_queries(self):
+        client = APIClient()
+        client.force_authenticate(self.doctor.user)
+        with CaptureQueriesContext(connection) as one:
+            response = client.get('/api/patients/search/', {'q': 'p-kakamega-0001'})
+        self.assertEqual([row['user'] for row in response.data], [self.wanjiru.pk])
+        self.assertIsNotNone(response.data[0]['last_assessment_date'])
+        with CaptureQueriesContext(connection) as many:
+            response = client.get('/api/patients/search/', {'q': 'example.com'})
+        self.assertEqual(len(response.data), 3)
+        self.assertEqual(len(many), len(one))
+
+    def test_only_doctors_can_search(self):
+        client = APIClient()
+        client.force_authenticate(self.wanjiru.user)
+        self.assertEqual(client.get('/api/patients/search/', {'q': 'achieng'}).status_code, 403)
+
+
+class SearchWithoutTrigramSupportTests(TransactionTestCase):
+    """SQLite builds without FTS5 or its trigram tokenizer: migrations skip the index, search uses the ORM."""
+
+    def setUp(self):
+        clear_lookup_caches()
+        self.index_migration = importlib.import_module('core.migrations.0003_patient_search_index')
+        executor = MigrationExecutor(connection)
+        executor.migrate([('core', '0002_screeningrecord_source_fingerprint')])
+        with mock.patch.object(self.index_migration, 'supports_trigram_index', return_value=False):
+            executor.loader.build_graph()
+            executor.migrate(executor.loader.graph.leaf_nodes())
+
+    def tearDown(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate([('core', '0002_screeningrecord_source_fingerprint')])
+        executor.loader.build_graph()
+        executor.migrate(executor.loader.graph.leaf_nodes())
+        clear_lookup_caches()
+
+    def test_migrations_skip_the_index_and_search_falls_back(self):
+        self.assertNotIn(search.SEARCH_TABLE, connection.introspection.table_names())
+        self.assertTrue(self.index_migration.supports_trigram_index(connection)) # This build does support it
+        patient = make_patient('p-kakamega-0001', first_name='Wanjiru')
+        make_screening(patient, region='Kakamega') # No trigger may reference the missing table
+        with mock.patch.object(search, '_index_available', False):
+            self.assertEqual([p.pk for p in search_patients(PatientProfile.objects.all(), 'wanj')], [patient.pk])
+            self.assertEqual(search_patients(PatientProfile.objects.all(), 'kamega'), [])
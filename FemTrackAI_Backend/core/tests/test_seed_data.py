@@ -0,0 +1,61 @@
+# core/tests/test_seed_data.py
+import csv
+import os
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from ..management.commands.seed_data import SEED_COLUMNS
+from ..models import ScreeningRecord
+from .helpers import clear_lookup_caches, seed_row
+
+
+class SeedCommandTestCase(TestCase):
+    """Runs seed_data over rows written to a temporary CSV."""
+
+    def setUp(self):
+        clear_lookup_caches()
+        handle, self.csv_path = tempfile.mkstemp(suffix='.csv')
+        os.close(handle)
+        self.addCleanup(os.remove, self.csv_path)
+
+    def seed(self, rows, *args):
+        with open(self.csv_path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.DictWriter(f, fieldnames=SEED_COLUMNS)
+            writer.writeheader()
+            writer.writerows(rows)
+        out = StringIO()
+        call_command('seed_data', self.csv_path, '--reuse-password-hash', *args, stdout=out)
+        self.assertIn('Successfully seeded database!', out.getvalue())
+        return out.getvalue()
+
+
+class SeedFingerprintTests(SeedCommandTestCase):
+    def test_unchanged_rows_are_skipped(self):
+        rows = [seed_row('P0001'), seed_row('P0002')]
+        self.assertIn('Rows created: 2, updated: 0, unchanged: 0', self.seed(rows))
+        self.assertIn('Rows created: 0, updated: 0, unchanged: 2', self.seed(rows))
+        self.assertEqual(ScreeningRecord.objects.count(), 2)
+
+    def test_changed_rows_update_the_seeded_screening(self):
+        self.seed([seed_row('P0001'), seed_row('P0002')])
+        screening = ScreeningRecord.objects.get(patient__user__username='p0001')
+
+        output = self.seed([seed_row('P0001', Region='Kakamega'), seed_row('P0002')])
+        self.assertIn('Rows created: 0, updated: 1, unchanged: 1', output)
+        updated = ScreeningRecord.objects.get(patient__user__username='p0001')
+        self.assertEqual(updated.pk, screening.pk)
+        self.assertEqual(updated.region.name, 'Kakamega')
+        self.assertNotEqual(updated.source_fingerprint, screening.source_fingerprint)
+
+    def test_screenings_seeded_before_fingerprints_are_adopted(self):
+        rows = [seed_row('P0001'), seed_row('P0002')]
+        self.seed(rows)
+        ScreeningRecord.objects.update(source_fingerprint=None)
+
+        self.assertIn('updated: 2', self.seed(rows))
+        self.assertEqual(ScreeningRecord.objects.count(), 2)
+        self.assertFalse(ScreeningRecord.objects.filter(source_fingerprint__isnull=True).exists())
+        self.assertIn('unchanged: 2', self.seed(rows))
@@ -0,0 +1,126 @@
+# core/tests/test_snapshots.py
+import csv
+import os
+import tempfile
+from pathlib import Path
+from unittest import mock
+
+import pandas as pd
+from django.test import SimpleTestCase, TestCase, tag
+from rest_framework.test import APIClient
+
+from .. import snapshots
+from ..management.commands.seed_data import SEED_COLUMNS
+from ..models import DoctorProfile, PatientProfile
+from ..snapshots import install_snapshot, snapshot_key, write_sized_dataset
+from ..test_runner import SEEDED_TAG, SnapshotTestRunner
+from .helpers import seed_row
+
+
+class SnapshotTestCase(SimpleTestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.dir = Path(self.tmp.name)
+
+    def write_csv(self, name, rows):
+        path = self.dir / name
+        with open(path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.DictWriter(f, fieldnames=SEED_COLUMNS)
+            writer.writeheader()
+            writer.writerows(rows)
+        return path
+
+
+class SnapshotKeyTests(SnapshotTestCase):
+    def test_key_follows_dataset_contents_and_size(self):
+        dataset = self.write_csv('data.csv', [seed_row('P0001')])
+        key = snapshot_key(dataset, rows=100)
+        self.assertEqual(snapshot_key(dataset, rows=100), key)
+        self.assertEqual(snapshot_key(self.write_csv('copy.csv', [seed_row('P0001')]), rows=100), key)
+        self.assertNotEqual(snapshot_key(dataset, rows=200), key)
+        self.assertNotEqual(snapshot_key(dataset), key)
+        self.write_csv('data.csv', [seed_row('P0001', Age='31')])
+        self.assertNotEqual(snapshot_key(dataset, rows=100), key)
+
+    def test_key_follows_the_seeding_code(self):
+        dataset = self.write_csv('data.csv', [seed_row('P0001')])
+        seeder = self.dir / 'seeder.py'
+        seeder.write_text('VERSION = 1\n')
+        with mock.patch.object(snapshots, 'SEEDER_SOURCES', [str(seeder)]):
+            key = snapshot_key(dataset)
+            seeder.write_text('VERSION = 2\n')
+            self.assertNotEqual(snapshot_key(dataset), key)
+
+
+class WriteSizedDatasetTests(SnapshotTestCase):
+    def sized(self, rows, count):
+        output = self.dir / 'sized.csv'
+        write_sized_dataset(self.write_csv('data.csv', rows), count, output)
+        return pd.read_csv(output, dtype=str, keep_default_na=False)
+
+    def test_valid_rows_are_cycled_with_fresh_ids(self):
+        rows = [seed_row('P0001', Age='30'), seed_row('P0002', Age='not a number'), seed_row('P0001', Age='40')]
+        df = self.sized(rows, 5)
+        self.assertEqual(list(df['Patient ID']), ['P0001', 'P0002', 'P0003', 'P0004', 'P0005'])
+        # The invalid row is left out; the duplicate ID of the third row doesn't matter as IDs are replaced
+        self.assertEqual(list(df['Age']), ['30', '40', '30', '40', '30'])
+        self.assertEqual(list(df.columns), SEED_COLUMNS)
+
+    def test_datasets_are_cut_to_size_and_ids_widened(self):
+        rows = [seed_row(f'P{i:04d}') for i in range(1, 4)]
+        self.assertEqual(list(self.sized(rows, 2)['Patient ID']), ['P0001', 'P0002'])
+        ids = self.sized(rows, 10000)['Patient ID']
+        self.assertEqual((ids.iloc[0], ids.iloc[-1], ids.nunique()), ('P00001', 'P10000', 10000))
+
+    def test_datasets_without_valid_rows_are_refused(self):
+        with self.assertRaises(ValueError):
+            self.sized([seed_row('P0001', Age='')], 5)
+
+
+class InstallSnapshotTests(SnapshotTestCase):
+    def test_snapshot_replaces_the_target(self):
+        snapshot = self.dir / 'snapshot.sqlite3'
+        snapshot.write_bytes(b'seeded')
+        target = self.dir / 'run' / 'test.sqlite3'
+        install_snapshot(snapshot, target)
+        target.write_bytes(b'changed by a run')
+        install_snapshot(snapshot, target)
+        self.assertEqual(target.read_bytes(), b'seeded')
+        self.assertEqual(snapshot.read_bytes(), b'seeded')
+        self.assertEqual(os.listdir(target.parent), ['test.sqlite3'])
+
+
+class SnapshotTestRunnerTests(SimpleTestCase):
+    def test_seeded_tests_only_run_with_a_snapshot(self):
+        with mock.patch.dict(os.environ, {'FEMTRACK_TEST_SNAPSHOT': ''}):
+            runner = SnapshotTestRunner()
+        self.assertEqual((runner.tags, runner.exclude_tags), (set(), {SEEDED_TAG}))
+
+        with mock.patch.dict(os.environ, {'FEMTRACK_TEST_SNAPSHOT': '/tmp/snapshot.sqlite3'}):
+            self.assertEqual(SnapshotTestRunner().tags, {SEEDED_TAG})
+            self.assertEqual(SnapshotTestRunner(tags=['search']).tags, {'search'})
+
+
+@tag(SEEDED_TAG)
+class SeededSnapshotTests(TestCase):
+    """Run with FEMTRACK_TEST_SNAPSHOT (see SnapshotTestRunner); these expect the seeded dataset."""
+
+    def setUp(self):
+        self.doctor = DoctorProfile.objects.get(user__email='doctor@femtrack.com')
+        self.client = APIClient()
+        self.client.force_authenticate(self.doctor.user)
+
+    def test_seeded_patients_are_on_the_default_doctors_panel(self):
+        counts = self.client.get('/api/patients/summary-counts/').data
+        self.assertGreater(counts['total_patients'], 0)
+        self.assertEqual(counts['total_patients'], PatientProfile.objects.count())
+        self.assertEqual(
+            counts['total_patients'],
+            sum(counts[key] for key in ('high_risk', 'moderate_risk', 'low_risk', 'pending_assessment'))
+        )
+
+    def test_seeded_patients_can_be_searched(self):
+        response = self.client.get('/api/patients/search/', {'q': 'p0001'})
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('p0001', [row['patient_id'] for row in response.data])
@@ -0,0 +1,66 @@
+# core/tests/test_validation.py
+import pandas as pd
+from django.test import SimpleTestCase
+
+from ..models import User
+from ..validation import validate_seed_rows
+from .helpers import seed_row
+from .test_seed_data import SeedCommandTestCase
+
+
+class ValidateSeedRowsTests(SimpleTestCase):
+    def frame(self, rows):
+        return pd.DataFrame(rows, dtype=str)
+
+    def test_valid_rows_are_returned_stripped(self):
+        valid, rejected = validate_seed_rows(self.frame([seed_row(' P0001 ', Region=' Pumwani ')]))
+        self.assertTrue(rejected.empty)
+        self.assertEqual(valid.iloc[0]['Patient ID'], 'P0001')
+        self.assertEqual(valid.iloc[0]['Region'], 'Pumwani')
+
+    def test_every_broken_rule_is_reported(self):
+        valid, rejected = validate_seed_rows(self.frame([
+            seed_row('P0001'),
+            seed_row('P0002', Age='abc', **{'Smoking Status': 'maybe', 'Screening Type Last': ' '}),
+            seed_row('P0003', Age='20', **{'First Sexual Activity Age': '25', 'Recommended Action': 'A' * 256}),
+        ]))
+        self.assertEqual(list(valid['Patient ID']), ['P0001'])
+        errors = dict(zip(rejected['Patient ID'], rejected['errors']))
+        self.assertIn('Age must be a whole number', errors['P0002'])
+        self.assertIn("Smoking Status must be one of ['Y', 'N']", errors['P0002'])
+        self.assertIn('Screening Type Last is required', errors['P0002'])
+        self.assertIn('First Sexual Activity Age is greater than Age', errors['P0003'])
+        self.assertIn('Recommended Action is longer than 255 characters', errors['P0003'])
+
+    def test_duplicate_ids_are_rejected_within_and_across_batches(self):
+        seen_ids = set()
+        valid, rejected = validate_seed_rows(
+            self.frame([seed_row('P0001'), seed_row('P0002'), seed_row('p0002')]), seen_ids=seen_ids
+        )
+        self.assertEqual(list(valid['Patient ID']), ['P0001'])
+        self.assertEqual(len(rejected), 2)
+
+        valid, rejected = validate_seed_rows(self.frame([seed_row(' p0001'), seed_row('P0003')]), seen_ids=seen_ids)
+        self.assertEqual(list(valid['Patient ID']), ['P0003'])
+        self.assertIn('already appeared in an earlier row', rejected.iloc[0]['errors'])
+
+    def test_missing_columns_reject_the_batch(self):
+        row = seed_row('P0001')
+        del row['Region']
+        valid, rejected = validate_seed_rows(self.frame([row]))
+        self.assertTrue(valid.empty)
+        self.assertIn("missing columns ['Region']", rejected.iloc[0]['errors'])
+
+
+class SeedValidationTests(SeedCommandTestCase):
+    def test_duplicate_ids_in_later_batches_are_rejected(self):
+        output = self.seed([seed_row('P0001'), seed_row('P0002'), seed_row('p0001 ', Age='40')], '--batch-size', '2')
+        self.assertIn('Rows created: 2, updated: 0, unchanged: 0, rejected: 1', output)
+        self.assertIn('already appeared in an earlier row', output)
+        self.assertEqual(User.objects.get(username='p0001').patient_profile.age, 30)
+
+    def test_stripped_values_are_stored(self):
+        self.seed([seed_row(' P0001 ', Region=' Pumwani ', **{'Risk Level': 'High Risk '})])
+        profile = User.objects.get(username='p0001').patient_profile
+        self.assertEqual(profile.risk_level, 'High Risk')
+        self.assertEqual(profile.screenings.get().region.name, 'Pumwani')
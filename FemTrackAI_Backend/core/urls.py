@@ -1,7 +1,7 @@
 # core/urls.py
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import UserViewSet, PatientProfileViewSet, DoctorProfileViewSet, ScreeningRecordViewSet
+from .views import UserViewSet, PatientProfileViewSet, DoctorProfileViewSet, ScreeningRecordViewSet, dashboard_events, dashboard_events_token
 from rest_framework.authtoken.views import obtain_auth_token # For simple token authentication
 
 router = DefaultRouter()
@@ -13,4 +13,6 @@ router.register(r'screenings', ScreeningRecordViewSet)
 urlpatterns = [
     path('', include(router.urls)),
     path('token-auth/', obtain_auth_token), # Endpoint for obtaining auth token
+    path('events/dashboard/', dashboard_events), # Live doctor dashboard updates (Server-Sent Events, ASGI only)
+    path('events/dashboard/token/', dashboard_events_token), # Short-lived token for opening the stream
 ]
\ No newline at end of file
@@ -0,0 +1,98 @@
+# core/validation.py
+import pandas as pd
+from .models import User, PatientProfile, ScreeningRecord, Region, ScreeningType, RecommendedAction
+
+YES_NO = ['Y', 'N']
+RISK_LEVELS = ['Low Risk', 'Moderate Risk', 'High Risk', 'Unknown']
+
+# Schema of the processed CSV consumed by seed_data, one entry per column.
+#   integer:    value must be a whole, non-negative number within [min, max]
+#   choices:    allowed values
+#   required:   value may not be blank (defaults to True)
+#   field:      (model, field name) the value is stored in; its max_length is enforced
+# Every column is checked, and handed back to the seeder, with surrounding whitespace stripped.
+SEED_SCHEMA = {
+    'Patient ID': {'field': (User, 'username')},
+    'Age': {'integer': True, 'min': 9, 'max': 120},
+    'Sexual Partners': {'integer': True, 'min': 0, 'max': 100},
+    'First Sexual Activity Age': {'integer': True, 'min': 8, 'max': 120},
+    'Risk Level': {'choices': RISK_LEVELS, 'field': (PatientProfile, 'risk_level')},
+    'HPV Test Result': {'choices': ['POSITIVE', 'NEGATIVE'], 'required': False},
+    'Pap Smear Result': {'choices': YES_NO, 'required': False, 'field': (ScreeningRecord, 'pap_smear_result')},
+    'Smoking Status': {'choices': YES_NO, 'field': (ScreeningRecord, 'smoking_status')},
+    'STDs History': {'choices': YES_NO, 'field': (ScreeningRecord, 'stds_history')},
+    'Region': {'required': False, 'field': (Region, 'name')},
+    'Insrance Covered': {'choices': YES_NO, 'field': (ScreeningRecord, 'insurance_covered')},
+    'Recommended Action': {'required': False, 'field': (RecommendedAction, 'name')},
+    'Screening Type Last': {'field': (ScreeningType, 'name')},
+}
+
+
+def _max_length(model, field_name):
+    return model._meta.get_field(field_name).max_length # None for TextFields
+
+
+def validate_seed_rows(df, seen_ids=None):
+    """
+    Validates a batch of seed rows against SEED_SCHEMA, one vectorized check per rule.
+
+    Args:
+        df (pandas.DataFrame): Batch read with dtype=str and blanks as '' (not NaN).
+        seen_ids (set): Optional. Lowercased Patient IDs of earlier batches; rows repeating one are rejected,
+            and this batch's IDs are added to it, so duplicates are caught across a whole file.
+
+    Returns:
+        tuple: (valid_df, rejected_df). valid_df holds the rows that passed, with the schema columns
+        stripped of surrounding whitespace (the values that were validated and are to be stored).
+        rejected_df holds the offending rows as read, plus an 'errors' column describing every rule
+        each row broke.
+    """
+    errors = pd.Series('', index=df.index)
+
+    def reject(mask, message):
+        nonlocal errors
+        errors = errors.where(~mask, errors + message + '; ')
+
+    missing = [col for col in SEED_SCHEMA if col not in df.columns]
+    if missing:
+        # Nothing in this batch can be seeded without its columns
+        reject(pd.Series(True, index=df.index), f"missing columns {missing}")
+        return df.iloc[0:0], df.assign(errors=errors.str.rstrip('; '))
+
+    numbers = {}
+    cleaned = df.copy()
+    for col, rules in SEED_SCHEMA.items():
+        stripped = df[col].astype(str).str.strip()
+        cleaned[col] = stripped
+        blank = stripped == ''
+
+        if rules.get('required', True):
+            reject(blank, f"{col} is required")
+
+        if rules.get('integer'):
+            not_integer = ~blank & ~stripped.str.fullmatch(r'\d+')
+            reject(not_integer, f"{col} must be a whole number")
+            numbers[col] = pd.to_numeric(stripped.where(~not_integer & ~blank), errors='coerce')
+            out_of_range = (numbers[col] < rules['min']) | (numbers[col] > rules['max'])
+            reject(out_of_range, f"{col} must be between {rules['min']} and {rules['max']}")
+
+        if 'choices' in rules:
+            reject(~blank & ~stripped.isin(rules['choices']), f"{col} must be one of {rules['choices']}")
+
+        if 'field' in rules:
+            max_length = _max_length(*rules['field'])
+            if max_length:
+                reject(stripped.str.len() > max_length, f"{col} is longer than {max_length} characters")
+
+    # Cross-column and cross-row rules
+    reject(numbers['First Sexual Activity Age'] > numbers['Age'], "First Sexual Activity Age is greater than Age")
+    patient_ids = cleaned['Patient ID'].str.lower()
+    present = patient_ids != ''
+    reject(present & patient_ids.duplicated(keep=False), "Patient ID appears more than once in the batch")
+    if seen_ids is not None:
+        # The earlier row was already seeded; a repeat would silently overwrite it through the update path
+        reject(present & patient_ids.isin(seen_ids), "Patient ID already appeared in an earlier row of the file")
+        seen_ids.update(patient_ids[present])
+
+    bad = errors != ''
+    return cleaned[~bad], df[bad].assign(errors=errors[bad].str.rstrip('; '))
@@ -1,20 +1,34 @@
 from django.shortcuts import render
 # core/views.py
+import asyncio
+from django.core import signing
+from django.core.handlers.asgi import ASGIRequest
+from django.http import JsonResponse, StreamingHttpResponse
 from rest_framework import viewsets, status
-from rest_framework.decorators import action
+from rest_framework.authtoken.models import Token
+from rest_framework.decorators import action, api_view
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, AllowAny
-from django.db.models import Count
+from django.db.models import Count, Max
 
-from .models import User, PatientProfile, DoctorProfile, ScreeningRecord
+from .models import User, PatientProfile, DoctorProfile, ScreeningRecord, ArchivedScreeningRecord, RiskLevel
 from .serializers import (
     UserSerializer,
     PatientProfileSerializer,
     DoctorProfileSerializer,
     ScreeningRecordSerializer,
+    ArchivedScreeningRecordSerializer,
     PatientRiskReportSerializer,
     DoctorPatientListSerializer
 )
+from .search import search_patients
+from .events import hub, doctor_topic, format_sse, publish_patient_update, RISK_COUNT_KEYS
+
+# Seconds between SSE keep-alive comments on an idle dashboard stream
+EVENT_STREAM_KEEPALIVE = 20
+# Seconds a stream token from dashboard_events_token stays valid for opening the stream
+EVENT_STREAM_TOKEN_MAX_AGE = 60
 
 class UserViewSet(viewsets.ModelViewSet):
     queryset = User.objects.all()
@@ -68,19 +82,25 @@ class UserViewSet(viewsets.ModelViewSet):
         return Response(serializer.data)
 
 
+def visible_patients(user):
+    """The patient profiles `user` may see and record screenings for."""
+    # A patient can only see their own profile
+    if user.user_type == 'patient':
+        return PatientProfile.objects.filter(user=user)
+    # Doctors can see the patients on their panel (DoctorProfile's pk is the user id, so no join to doctors).
+    # Patients join a panel through an explicit assignment (admin, seed_data), never as a side effect of the API.
+    elif user.user_type == 'doctor':
+        return PatientProfile.objects.filter(doctor_assignments__doctor_id=user.pk)
+    return PatientProfile.objects.none() # Admins can access all via default queryset
+
+
 class PatientProfileViewSet(viewsets.ModelViewSet):
     queryset = PatientProfile.objects.all()
     serializer_class = PatientProfileSerializer
     permission_classes = [IsAuthenticated] # Only authenticated users can access profiles
 
     def get_queryset(self):
-        # A patient can only see their own profile
-        if self.request.user.user_type == 'patient':
-            return PatientProfile.objects.filter(user=self.request.user)
-        # Doctors can see all patient profiles (for now, refine later for specific doctor's patients)
-        elif self.request.user.user_type == 'doctor':
-            return PatientProfile.objects.all()
-        return PatientProfile.objects.none() # Admins can access all via default queryset
+        return visible_patients(self.request.user)
 
     # Custom action for a patient to get their own risk report (as per frontend design)
     @action(detail=True, methods=['get'], url_path='risk-report', permission_classes=[IsAuthenticated])
@@ -88,7 +108,7 @@ class PatientProfileViewSet(viewsets.ModelViewSet):
         """
         Retrieves the personalized risk report for a specific patient.
         If the requesting user is a patient, they can only see their own report.
-        If the requesting user is a doctor, they can see any patient's report.
+        If the requesting user is a doctor, they can see the report of any patient on their panel.
         """
         try:
             patient_profile = self.get_queryset().get(pk=pk)
@@ -109,29 +129,55 @@ class PatientProfileViewSet(viewsets.ModelViewSet):
         if request.user.user_type != 'doctor':
             return Response({"detail": "Only doctors can access this resource."}, status=status.HTTP_403_FORBIDDEN)
 
-        queryset = self.get_queryset() # This will already filter for doctors to see all
+        # Scoped to the doctor's panel; user and latest screening date come in the same query instead of one per row
+        queryset = self.get_queryset().select_related('user').annotate(
+            latest_screening_date=Max('screenings__screening_date')
+        )
         serializer = DoctorPatientListSerializer(queryset, many=True)
         # You can add aggregation logic here for Total Patients, High Risk etc. counts
         # For now, frontend can count from this list.
         return Response(serializer.data)
 
+    # Search for doctors: GET patients/search/?q=<text>&limit=<n>
+    # Matches Patient ID (username), email, first/last name and region, prefix matches first, then fuzzy ones
+    @action(detail=False, methods=['get'], url_path='search', permission_classes=[IsAuthenticated])
+    def search(self, request):
+        if request.user.user_type != 'doctor':
+            return Response({"detail": "Only doctors can access this resource."}, status=status.HTTP_403_FORBIDDEN)
+
+        try:
+            limit = min(max(int(request.query_params.get('limit', 20)), 1), 100)
+        except ValueError:
+            return Response({"detail": "limit must be a number."}, status=status.HTTP_400_BAD_REQUEST)
+
+        panel = self.get_queryset()
+        patients = search_patients(panel, request.query_params.get('q', ''), limit=limit)
+        # Last assessment dates of all results in one query, like the dashboard list's annotation
+        latest = dict(
+            panel.filter(pk__in=[patient.pk for patient in patients])
+            .annotate(latest_screening_date=Max('screenings__screening_date'))
+            .values_list('pk', 'latest_screening_date')
+        )
+        for patient in patients:
+            patient.latest_screening_date = latest[patient.pk]
+        serializer = DoctorPatientListSerializer(patients, many=True)
+        return Response(serializer.data)
+
     @action(detail=False, methods=['get'], url_path='summary-counts', permission_classes=[IsAuthenticated])
     def summary_counts(self, request):
         if request.user.user_type != 'doctor':
             return Response({"detail": "Only doctors can access this resource."}, status=status.HTTP_403_FORBIDDEN)
 
-        total_patients = PatientProfile.objects.count()
-        risk_counts = PatientProfile.objects.values('risk_level').annotate(count=Count('risk_level'))
+        panel = self.get_queryset() # Counts cover the doctor's panel only
+        total_patients = panel.count()
+        risk_counts = panel.values('risk_level').annotate(count=Count('risk_level'))
 
         risk_dict = {item['risk_level']: item['count'] for item in risk_counts}
 
-        response_data = {
-            'total_patients': total_patients,
-            'high_risk': risk_dict.get('High Risk', 0),
-            'moderate_risk': risk_dict.get('Moderate Risk', 0),
-            'low_risk': risk_dict.get('Low Risk', 0),
-            'pending_assessment': risk_dict.get('Unknown', 0) # Assuming 'Unknown' means pending or needs review
-        }
+        response_data = {'total_patients': total_patients}
+        # Same keys as the deltas pushed over the dashboard event stream
+        for risk_level, key in RISK_COUNT_KEYS.items():
+            response_data[key] = risk_dict.get(risk_level, 0)
         return Response(response_data)
 
 
@@ -153,14 +199,40 @@ class ScreeningRecordViewSet(viewsets.ModelViewSet):
     permission_classes = [IsAuthenticated]
 
     def get_queryset(self):
+        # patient_email and doctor_email come from the related users; lookup names come from the lookup cache
+        screenings = ScreeningRecord.objects.select_related('patient__user', 'doctor__user')
         # Patients can only see their own screening records
         if self.request.user.user_type == 'patient':
-            return ScreeningRecord.objects.filter(patient__user=self.request.user)
-        # Doctors can see all screening records (for now, refine if specific doctor's patients)
+            return screenings.filter(patient__user=self.request.user)
+        # Doctors can see the screening records of the patients on their panel
         elif self.request.user.user_type == 'doctor':
-            return ScreeningRecord.objects.all()
+            return screenings.filter(patient__doctor_assignments__doctor_id=self.request.user.pk)
         return ScreeningRecord.objects.none() # Admins can access all via default queryset
 
+    def _archived_queryset(self):
+        # Same visibility rules as get_queryset, over the archive table
+        archived = ArchivedScreeningRecord.objects.select_related('patient__user', 'doctor__user')
+        if self.request.user.user_type == 'patient':
+            return archived.filter(patient__user=self.request.user)
+        elif self.request.user.user_type == 'doctor':
+            return archived.filter(patient__doctor_assignments__doctor_id=self.request.user.pk)
+        return ArchivedScreeningRecord.objects.none()
+
+    def list(self, request, *args, **kwargs):
+        # The archive is only read when asked for, so the default list stays on the small hot table
+        if request.query_params.get('include_archived', '').lower() not in ('true', '1'):
+            return super().list(request, *args, **kwargs)
+        screenings = self.get_serializer(self.filter_queryset(self.get_queryset()), many=True).data
+        archived = ArchivedScreeningRecordSerializer(
+            self._archived_queryset(), many=True, context=self.get_serializer_context()
+        ).data
+        # Archived screenings are older than every live screening of the same patient, but not necessarily
+        # than other patients' ones, so merge both lists newest first
+        combined = sorted(
+            list(screenings) + list(archived), key=lambda row: (row['screening_date'], row['id']), reverse=True
+        )
+        return Response(combined)
+
     def perform_create(self, serializer):
         # When creating a screening record, associate it with the correct patient and doctor
         # If doctor is making the assessment, link it to them
@@ -173,14 +245,16 @@ class ScreeningRecordViewSet(viewsets.ModelViewSet):
 
         # For a new assessment, the patient's risk level should be updated based on this new screening
         # You'll need to pass the patient_id in the request data
-        patient_id = self.request.data.get('patient')
+        # Only patients on the doctor's own panel (or, for a patient, themselves) can be assessed
+        patient_id = serializer.validated_data['patient'].pk
         try:
-            patient_profile = PatientProfile.objects.get(pk=patient_id)
+            patient_profile = visible_patients(self.request.user).get(pk=patient_id)
         except PatientProfile.DoesNotExist:
-            return Response({'detail': 'Patient not found for this screening.'}, status=status.HTTP_400_BAD_REQUEST)
+            raise ValidationError({'patient': ['Patient not found for this screening.']})
 
         # Save the screening record
         screening = serializer.save(doctor=doctor_profile, patient=patient_profile)
+        old_risk_level = patient_profile.risk_level
 
         # Recalculate and update the patient's overall risk level based on the new screening
         # This is where your rule-based logic from data preprocessing comes in.
@@ -188,9 +262,12 @@ class ScreeningRecordViewSet(viewsets.ModelViewSet):
         # dictates the patient's overall risk for now. In a real scenario, you'd
         # analyze all past screenings for a comprehensive risk.
 
-        patient_profile.risk_level = screening.assessment_risk_level
+        patient_profile.risk_level = RiskLevel(screening.assessment_risk_level).label
         patient_profile.save()
 
+        # Push the counter change and refreshed row to the live dashboards of the patient's doctors
+        publish_patient_update(patient_profile, old_risk_level=old_risk_level)
+
     # Action for a doctor to create a new assessment for a patient
     @action(detail=False, methods=['post'], url_path='new-assessment', permission_classes=[IsAuthenticated])
     def new_assessment(self, request):
@@ -201,4 +278,87 @@ class ScreeningRecordViewSet(viewsets.ModelViewSet):
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         self.perform_create(serializer)
-        return Response(serializer.data, status=status.HTTP_201_CREATED)
\ No newline at end of file
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+
+async def _event_stream(topic):
+    subscriber = hub.subscribe(topic)
+    _, queue = subscriber
+    try:
+        yield 'retry: 5000\n\n' # Reconnect delay for EventSource, in milliseconds
+        yield format_sse({'type': 'ready'})
+        while True:
+            try:
+                event = await asyncio.wait_for(queue.get(), timeout=EVENT_STREAM_KEEPALIVE)
+            except asyncio.TimeoutError:
+                yield ': keepalive\n\n' # Comment line: keeps proxies from closing an idle connection
+                continue
+            yield format_sse(event)
+    finally:
+        # Runs when the client disconnects and the server cancels the stream
+        hub.unsubscribe(topic, subscriber)
+
+
+def _stream_signer():
+    return signing.TimestampSigner(salt='core.views.dashboard_events')
+
+
+@api_view(['POST'])
+def dashboard_events_token(request):
+    """
+    Issues a token for opening the dashboard event stream, valid for EVENT_STREAM_TOKEN_MAX_AGE seconds.
+    It only needs to outlive the connection attempt: an open stream stays open, and a client that reconnects
+    later asks for a new one.
+    """
+    if request.user.user_type != 'doctor':
+        return Response({'detail': 'Only doctors can access this resource.'}, status=status.HTTP_403_FORBIDDEN)
+    return Response({
+        'token': _stream_signer().sign(str(request.user.pk)),
+        'expires_in': EVENT_STREAM_TOKEN_MAX_AGE,
+    })
+
+
+async def dashboard_events(request):
+    """
+    Server-Sent Events stream of live updates for the requesting doctor's dashboard.
+
+    Events: 'ready' once subscribed; 'patient' with {'counts': {<summary key>: <delta>}, 'patient': <dashboard row>}
+    whenever a patient on the doctor's panel changes; 'resync' when the client fell behind and should refetch.
+
+    EventSource cannot send headers, so browsers pass a short-lived token from dashboard_events_token as
+    ?token=<stream token>, which keeps the permanent API token out of URLs and access logs. An
+    'Authorization: Token <key>' header and session auth also work. Requires an ASGI server (femtrack_ai_backend/asgi.py); each idle client only holds a coroutine and a queue.
+    """
+    if not isinstance(request, ASGIRequest):
+        return JsonResponse({'detail': 'Event streams require the ASGI server.'}, status=status.HTTP_501_NOT_IMPLEMENTED)
+
+    user = None
+    stream_token = request.GET.get('token')
+    auth_header = request.headers.get('Authorization', '')
+    if stream_token:
+        try:
+            user_id = _stream_signer().unsign(stream_token, max_age=EVENT_STREAM_TOKEN_MAX_AGE)
+        except signing.BadSignature: # Includes SignatureExpired
+            pass
+        else:
+            user = await User.objects.filter(pk=user_id).afirst()
+    elif auth_header.startswith('Token '):
+        try:
+            key = auth_header.split(' ', 1)[1].strip()
+            user = (await Token.objects.select_related('user').aget(key=key)).user
+        except Token.DoesNotExist:
+            pass
+    else:
+        session_user = await request.auser()
+        if session_user.is_authenticated:
+            user = session_user
+
+    if user is None or not user.is_active:
+        return JsonResponse({'detail': 'Authentication credentials were not provided.'}, status=status.HTTP_401_UNAUTHORIZED)
+    if user.user_type != 'doctor':
+        return JsonResponse({'detail': 'Only doctors can access this resource.'}, status=status.HTTP_403_FORBIDDEN)
+
+    response = StreamingHttpResponse(_event_stream(doctor_topic(user.pk)), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no' # Disable proxy buffering (nginx)
+    return response
@@ -3,6 +3,9 @@ ASGI config for femtrack_ai_backend project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Serve the project through it (e.g. ``uvicorn femtrack_ai_backend.asgi:application``)
+for the live doctor dashboard stream at /api/events/dashboard/.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 """
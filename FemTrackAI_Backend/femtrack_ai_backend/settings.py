@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -90,13 +91,18 @@ WSGI_APPLICATION = 'femtrack_ai_backend.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
+# FEMTRACK_DB_PATH points a run at another database file, e.g. a copy of a seeded snapshot (manage.py seed_snapshot).
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        'NAME': os.environ.get('FEMTRACK_DB_PATH') or BASE_DIR / 'db.sqlite3',
     }
 }
 
+# FEMTRACK_TEST_SNAPSHOT=<snapshot file> runs the tests tagged 'seeded' against a fresh copy of a seeded snapshot;
+# without it the other tests run on an empty in-memory database (see core/test_runner.py)
+TEST_RUNNER = 'core.test_runner.SnapshotTestRunner'
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -146,4 +152,7 @@ CORS_ALLOWED_ORIGINS = [
 # Or, for development, you can allow all origins (less secure for production):
 # CORS_ALLOW_ALL_ORIGINS = True
 
-AUTH_USER_MODEL = 'core.User'
\ No newline at end of file
+AUTH_USER_MODEL = 'core.User'
+# Screenings older than this many days are moved to the archive table by `manage.py archive_screenings`
+# (a patient's latest screening always stays live). Override per run with --days.
+SCREENING_ARCHIVE_AFTER_DAYS = 730
@@ -1,7 +1,7 @@
 // src/pages/DoctorDashboard.js
 import React, { useEffect, useState } from 'react';
 import { useAuth } from '../context/AuthContext'; // Correct path from pages to context
-import api from '../services/api';
+import api, { API_BASE_URL } from '../services/api';
 import { useNavigate } from 'react-router-dom'; // Import useNavigate here
 
 const DoctorDashboard = () => {
@@ -37,6 +37,83 @@ const DoctorDashboard = () => {
         }
     }, [isAuthenticated, user, loading]);
 
+    // Live updates: the backend pushes counter deltas and changed patient rows over Server-Sent Events,
+    // so the dashboard stays current without reloading (needs the backend running under ASGI)
+    useEffect(() => {
+        if (loading || !isAuthenticated || !user || user.user_type !== 'doctor') {
+            return undefined;
+        }
+        let source = null;
+        let retryTimer = null;
+        let stopped = false;
+
+        const applyPatientUpdate = (event) => {
+            const { counts, patient } = JSON.parse(event.data);
+            setSummaryCounts(prev => {
+                if (!prev) return prev;
+                const next = { ...prev };
+                Object.entries(counts).forEach(([key, delta]) => {
+                    next[key] = (next[key] || 0) + delta;
+                });
+                return next;
+            });
+            setPatientList(prev => {
+                const index = prev.findIndex(row => row.user === patient.user);
+                if (index === -1) return [...prev, patient];
+                const next = [...prev];
+                next[index] = patient;
+                return next;
+            });
+        };
+
+        // We fell behind the stream: refetch everything once
+        const resync = async () => {
+            try {
+                const [countsResponse, patientListResponse] = await Promise.all([
+                    api.get('patients/summary-counts/'),
+                    api.get('patients/for-doctor-dashboard/'),
+                ]);
+                setSummaryCounts(countsResponse.data);
+                setPatientList(patientListResponse.data);
+            } catch (err) {
+                console.error('Error refreshing doctor data:', err);
+            }
+        };
+
+        // EventSource cannot send the Authorization header, so the stream is opened with a short-lived token
+        // instead of the API token, which would otherwise end up in server access logs
+        const connect = async () => {
+            try {
+                const { data } = await api.post('events/dashboard/token/');
+                if (stopped) return;
+                source = new EventSource(`${API_BASE_URL}events/dashboard/?token=${encodeURIComponent(data.token)}`);
+            } catch (err) {
+                console.error('Error opening live updates:', err);
+                retryTimer = setTimeout(connect, 5000);
+                return;
+            }
+            source.addEventListener('patient', applyPatientUpdate);
+            source.addEventListener('resync', resync);
+            // 'ready' comes after every (re)connect, once subscribed: refetch to pick up changes made while
+            // the stream was down, which are never replayed
+            source.addEventListener('ready', resync);
+            // EventSource reconnects dropped streams by itself, but gives up once the server rejects its
+            // (by then expired) token: fetch a new token and reconnect
+            source.onerror = () => {
+                if (source.readyState === EventSource.CLOSED && !stopped) {
+                    retryTimer = setTimeout(connect, 5000);
+                }
+            };
+        };
+        connect();
+
+        return () => {
+            stopped = true;
+            clearTimeout(retryTimer);
+            if (source) source.close();
+        };
+    }, [isAuthenticated, user, loading]);
+
     // Handle logout, passing the navigate function
     const handleLogout = () => {
         logout(navigate); // Pass navigate to the logout function
@@ -1,7 +1,7 @@
 // src/services/api.js
 import axios from 'axios';
 
-const API_BASE_URL = 'http://localhost:8000/api/'; // Replace with your Django backend URL if different
+export const API_BASE_URL = 'http://localhost:8000/api/'; // Replace with your Django backend URL if different
 
 const api = axios.create({
     baseURL: API_BASE_URL,